@@ -1,12 +1,20 @@
 import os
+import sys
+import json
+import time
 import shutil
 import re
-import spacy
 import getpass
-from PIL import Image
-import pytesseract
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from cryptography.fernet import Fernet
 
+import event_log
+import secure_storage
+
+log = event_log.get_logger("Encrypted_app")
+
 # --- CONFIGURATION ---
 DOCS_TO_PROCESS_DIR = "documents_to_process"
 PROCESSED_DIR = "processed_documents"
@@ -16,85 +24,119 @@ KEY_FILE = "secret.key"
 os.makedirs(DOCS_TO_PROCESS_DIR, exist_ok=True)
 os.makedirs(PROCESSED_DIR, exist_ok=True)
 
+# Batch verification (verify_documents): texts per nlp.pipe batch and NER worker processes
+NLP_BATCH_SIZE = int(os.environ.get("NLP_BATCH_SIZE", 64))
+NLP_PROCESSES = int(os.environ.get("NLP_PROCESSES", 1))
+
 # Simple user database for authentication
 USER_CREDENTIALS = {
     "admin": "pass123"
 }
+# Credentials for unattended --batch/--rotate runs (cron etc.); the user is prompted when they aren't set
+BATCH_USERNAME = os.environ.get("SMART_BANK_USERNAME")
+BATCH_PASSWORD = os.environ.get("SMART_BANK_PASSWORD")
 
 # --- NLP MODEL LOADING ---
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    print("spaCy model not found. Please run 'python -m spacy download en_core_web_sm'")
-    exit()
-    
+# spaCy, PIL and Tesseract are loaded on first use so the CLI starts (and authenticates) instantly
+_nlp = None
+_nlp_lock = threading.Lock()
+
+def get_nlp():
+    """Loads the spaCy model on first use and returns the cached pipeline afterwards."""
+    global _nlp
+    with _nlp_lock:  # A caller arriving mid-load waits for it instead of loading a second copy
+        if _nlp is None:
+            import spacy
+            try:
+                _nlp = spacy.load("en_core_web_sm")
+            except OSError:
+                log.error("spaCy model not found. Please run 'python -m spacy download en_core_web_sm'")
+                exit()
+    return _nlp
+
+def warm_up():
+    """Loads the spaCy model and OCR libraries ahead of the first document (e.g. before forking workers)."""
+    get_nlp()
+    import PIL.Image  # noqa: F401
+    import pytesseract  # noqa: F401
+
 # --- SECURE STORAGE ENGINE ---
 
+_keyring = None
+
 def generate_key():
-    """Generates a new encryption key and saves it to 'secret.key'."""
-    key = Fernet.generate_key()
-    with open(KEY_FILE, "wb") as key_file:
-        key_file.write(key)
-    print(f"\n✅ A new key has been generated and saved to '{KEY_FILE}'.")
+    """Adds a new active key to the key ring in 'secret.key' (older keys keep decrypting existing files)."""
+    global _keyring
+    if os.path.exists(KEY_FILE):
+        keyring = secure_storage.KeyRing.from_file(KEY_FILE).rotated()
+    else:
+        keyring = secure_storage.KeyRing([Fernet.generate_key()])
+    keyring.save(KEY_FILE)
+    _keyring = keyring
+    print(f"\n✅ A new key (id {keyring.active_id.hex()}) has been added to '{KEY_FILE}' ({len(keyring)} key(s) in total).")
+    print("New files are encrypted with it; re-encrypt processed documents to move them onto it.")
     print("⚠️  IMPORTANT: Keep this key file safe! If you lose it, you cannot decrypt your files.")
 
 def load_key():
-    """Loads the encryption key from the 'secret.key' file."""
-    if not os.path.exists(KEY_FILE):
-        print("\n❌ Error: 'secret.key' not found.")
-        print("Please generate a key first from the main menu.")
-        return None
-    return open(KEY_FILE, "rb").read()
+    """Loads the key ring from the 'secret.key' file once and returns the cached ring afterwards."""
+    global _keyring
+    if _keyring is None:
+        if not os.path.exists(KEY_FILE):
+            print("\n❌ Error: 'secret.key' not found.")
+            print("Please generate a key first from the main menu.")
+            return None
+        _keyring = secure_storage.KeyRing.from_file(KEY_FILE)
+    return _keyring
 
 def encrypt_file(file_path: str, key):
-    """Encrypts a file using the provided key."""
-    f = Fernet(key)
+    """Encrypts a file in place with the key ring's active key (chunked, authenticated, atomic)."""
     try:
-        with open(file_path, "rb") as file:
-            original_data = file.read()
-        encrypted_data = f.encrypt(original_data)
-        with open(file_path, "wb") as file:
-            file.write(encrypted_data)
-        print(f"🔒 File '{os.path.basename(file_path)}' has been securely encrypted.")
+        secure_storage.encrypt_file(file_path, key)
+        log.info("🔒 File '%s' has been securely encrypted.", os.path.basename(file_path))
     except Exception as e:
-        print(f"An error occurred during encryption: {e}")
+        log.error("An error occurred during encryption of '%s': %s", os.path.basename(file_path), e)
 
 def decrypt_file(file_path: str, key):
-    """Decrypts a file using the provided key."""
-    f = Fernet(key)
+    """Decrypts a file in place with whichever ring key it names (also reads files from the old whole-file format)."""
     try:
-        with open(file_path, "rb") as file:
-            encrypted_data = file.read()
-        decrypted_data = f.decrypt(encrypted_data)
-        with open(file_path, "wb") as file:
-            file.write(decrypted_data)
-        print(f"🔓 File '{os.path.basename(file_path)}' has been successfully decrypted.")
+        secure_storage.decrypt_file(file_path, key)
+        log.info("🔓 File '%s' has been successfully decrypted.", os.path.basename(file_path))
     except Exception as e:
-        print(f"An error occurred during decryption. Incorrect key or corrupted file.")
+        log.error("An error occurred during decryption of '%s' (%s). Incorrect key or corrupted file.",
+                  os.path.basename(file_path), type(e).__name__)
 
 
 # --- AI & VERIFICATION ENGINE ---
 
 def extract_text_from_image(image_path: str) -> str:
-    """Uses Tesseract OCR to extract text from an image file."""
+    """Uses Tesseract OCR to extract text from an image file, decrypting encrypted files in memory."""
+    from PIL import Image
+    import pytesseract
+
     try:
-        with Image.open(image_path) as img:
-            return pytesseract.image_to_string(img)
+        encrypted = secure_storage.sniff_format(image_path) is not None
     except FileNotFoundError:
         return None
-    except Exception: # Catching specific pytesseract errors if any
-        # Decrypt temporarily if the file is encrypted
-        key = load_key()
-        if not key: return None
-        decrypt_file(image_path, key)
+
+    if not encrypted:
         with Image.open(image_path) as img:
-            text = pytesseract.image_to_string(img)
-        # Re-encrypt the file immediately after reading
-        encrypt_file(image_path, key)
-        return text
+            return pytesseract.image_to_string(img)
 
-def verify_document(text: str):
-    """Uses a combination of NLP (spaCy) and Regex to find and verify document details."""
+    # Plaintext only ever exists in this buffer, the file on disk stays encrypted
+    key = load_key()
+    if not key: return None
+    with Image.open(secure_storage.open_decrypted(image_path, key)) as img:
+        return pytesseract.image_to_string(img)
+
+def _ner_only_disabled(nlp):
+    """Pipeline components to disable so only NER (and the tok2vec it listens to, if any) runs."""
+    keep = {"ner"}
+    if "tok2vec" in nlp.pipe_names and "ner" in getattr(nlp.get_pipe("tok2vec"), "listening_components", []):
+        keep.add("tok2vec")
+    return [name for name in nlp.pipe_names if name not in keep]
+
+def _verify_with_entities(text: str, doc):
+    """Builds the verification result for one document from its text and its spaCy Doc."""
     results = {
         "doc_type": "Unknown", "name": None, "dob": None, "pan_number": None,
         "aadhaar_number": None, "verification_status": "Failed", "failure_reasons": []
@@ -105,7 +147,6 @@ def verify_document(text: str):
     elif re.search(r'aadhaar', text, re.IGNORECASE): results["doc_type"] = "Aadhaar Card"
     else: results["failure_reasons"].append("Could not determine document type.")
     
-    doc = nlp(text)
     for ent in doc.ents:
         if ent.label_ == "PERSON" and not results["name"] and len(ent.text.strip().split()) > 1:
             results["name"] = ent.text.strip()
@@ -129,13 +170,32 @@ def verify_document(text: str):
     if not results["failure_reasons"]: results["verification_status"] = "Verified"
     return results
 
+def verify_documents(texts, batch_size: int = NLP_BATCH_SIZE, n_process: int = NLP_PROCESSES):
+    """Verifies many OCR texts at once, yielding one verify_document() result per text, in order.
+
+    Texts are streamed through nlp.pipe with only the NER component enabled
+    (parser, tagger, lemmatizer etc. are skipped, we only need PERSON/DATE
+    entities); batch_size and n_process tune spaCy's batching and worker processes.
+    """
+    nlp = get_nlp()
+    docs = nlp.pipe(((text, text) for text in texts), as_tuples=True, batch_size=batch_size,
+                    n_process=n_process, disable=_ner_only_disabled(nlp))
+    for doc, text in docs:
+        yield _verify_with_entities(text, doc)
+
+def verify_document(text: str):
+    """Uses a combination of NLP (spaCy) and Regex to find and verify document details."""
+    return next(verify_documents([text], batch_size=1, n_process=1))
+
 # --- CLI INTERFACE ---
 
-def authenticate_user():
-    """Handles user login."""
+def authenticate_user(username=None, password=None):
+    """Handles user login (prompting for whichever of username/password isn't given)."""
     print("--- Smart Bank AI Authentication ---")
-    username = input("Username: ")
-    password = getpass.getpass("Password: ")
+    if username is None:
+        username = input("Username: ")
+    if password is None:
+        password = getpass.getpass("Password: ")
     if USER_CREDENTIALS.get(username) == password:
         print("\n✅ Login Successful!")
         return True
@@ -166,11 +226,13 @@ def handle_document_processing():
     # ... more details can be printed here ...
 
     if verification_results['verification_status'] == "Verified":
-        destination_path = os.path.join(PROCESSED_DIR, file_name)
-        shutil.move(source_path, destination_path)
-        print(f"\nMoved '{file_name}' to '{PROCESSED_DIR}'.")
-        # Automatically encrypt the file after moving
-        encrypt_file(destination_path, key)
+        # Moved and encrypted automatically; if encryption fails the file stays where it was
+        try:
+            store_verified_document(file_name, key)
+        except Exception as e:
+            print(f"❌ ERROR: '{file_name}' could not be encrypted, it was left in '{DOCS_TO_PROCESS_DIR}' ({e}).")
+            return
+        print(f"\nMoved '{file_name}' to '{PROCESSED_DIR}' and encrypted it.")
 
 def handle_decryption():
     """Handles the decryption of a specific processed file."""
@@ -188,18 +250,184 @@ def handle_decryption():
     decrypt_file(file_path, key)
 
 
+def _reencrypt_one(file_path: str, keyring):
+    """Runs in a worker process: moves one file onto the active key, never raising."""
+    try:
+        return secure_storage.reencrypt_file(file_path, keyring)
+    except Exception as e:
+        return f"error ({type(e).__name__}: {e})"
+
+def rotate_processed_documents(workers: int):
+    """Re-encrypts every file in PROCESSED_DIR with the active key, in parallel.
+
+    Files already on the active key are skipped, so an interrupted run can just be started again.
+    """
+    keyring = load_key()
+    if not keyring: return 1
+
+    file_names = sorted(
+        name for name in os.listdir(PROCESSED_DIR)
+        if not name.startswith(".") and os.path.isfile(os.path.join(PROCESSED_DIR, name))
+    )
+    print(f"Re-encrypting {len(file_names)} file(s) in '{PROCESSED_DIR}' with key {keyring.active_id.hex()}...")
+    counts = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_reencrypt_one, os.path.join(PROCESSED_DIR, name), keyring): name for name in file_names
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            outcome = future.result()
+            status = "error" if outcome.startswith("error") else outcome
+            counts[status] = counts.get(status, 0) + 1
+            if status != "current":
+                print(f"[{done}/{len(file_names)}] {futures[future]}: {outcome}")
+
+    summary = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+    print(f"\n✅ Rotation finished. {summary or 'nothing to do'}")
+    return 1 if counts.get("error") else 0
+
+
+# --- BATCH MODE ---
+
+def store_verified_document(file_name: str, key):
+    """Moves a verified document into PROCESSED_DIR and encrypts it there.
+
+    Raises if encryption fails, after moving the (still plaintext) file back to
+    DOCS_TO_PROCESS_DIR so no unencrypted document is left among the processed ones.
+    """
+    source_path = os.path.join(DOCS_TO_PROCESS_DIR, file_name)
+    destination_path = os.path.join(PROCESSED_DIR, file_name)
+    shutil.move(source_path, destination_path)
+    try:
+        secure_storage.encrypt_file(destination_path, key)
+    except Exception:
+        shutil.move(destination_path, source_path)
+        raise
+
+def ocr_queued_document(file_name: str):
+    """Runs in a worker process: OCR of one queued document.
+
+    Returns (report record, extracted text); the text is None when OCR failed
+    (the record then has status "Error").
+    """
+    source_path = os.path.join(DOCS_TO_PROCESS_DIR, file_name)
+    record = {"file": file_name, "pid": os.getpid()}
+    started = time.perf_counter()
+    extracted_text = None
+    try:
+        extracted_text = extract_text_from_image(source_path)
+        if extracted_text is None:
+            raise FileNotFoundError(f"'{file_name}' disappeared before it could be processed")
+        log.debug("Extracted text of '%s': %s", file_name, event_log.excerpt(extracted_text),
+                  extra={"event": "extracted_text"})
+    except Exception as e:
+        record["status"] = "Error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["ocr_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return record, extracted_text
+
+def store_queued_document(record, key):
+    """Runs in a worker process: stores a verified document, recording the outcome in its report record."""
+    started = time.perf_counter()
+    try:
+        store_verified_document(record["file"], key)
+    except Exception as e:
+        record["status"] = "Error"
+        record["error"] = f"encryption failed, left in '{DOCS_TO_PROCESS_DIR}' ({type(e).__name__}: {e})"
+    record["store_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return record
+
+def run_batch(workers: int, report_path: str):
+    """Verifies every file queued in DOCS_TO_PROCESS_DIR, writing a JSONL report.
+
+    OCR and encryption run across a process pool; the OCR texts are verified
+    NLP_BATCH_SIZE at a time through verify_documents (one nlp.pipe stream)
+    as they come in.
+    """
+    key = load_key()
+    if not key: return 1
+
+    file_names = sorted(
+        name for name in os.listdir(DOCS_TO_PROCESS_DIR)
+        if not name.startswith(".") and os.path.isfile(os.path.join(DOCS_TO_PROCESS_DIR, name))
+    )
+    if not file_names:
+        print(f"Nothing to process in '{DOCS_TO_PROCESS_DIR}'.")
+        return 0
+
+    # Load spaCy/OCR once here, before the pool forks its workers
+    warm_up()
+
+    print(f"Processing {len(file_names)} file(s) from '{DOCS_TO_PROCESS_DIR}' with {workers} worker(s)...")
+    counts = {}
+    done = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor, \
+            open(report_path, "a", encoding="utf-8") as report:
+
+        def finish(record):
+            nonlocal done
+            done += 1
+            record["total_ms"] = round(sum(record.get(stage, 0) for stage in ("ocr_ms", "verify_ms", "store_ms")), 1)
+            report.write(json.dumps(record) + "\n")
+            report.flush()  # Keep the report usable even if the run is interrupted
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+            print(f"[{done}/{len(file_names)}] {record['file']}: {record['status']} ({record['total_ms']} ms)")
+
+        store_futures = []
+
+        def verify(pending):
+            stage = time.perf_counter()
+            results = list(verify_documents([text for _, text in pending]))
+            verify_ms = round((time.perf_counter() - stage) * 1000 / len(pending), 1)  # Batch time, per document
+            for (record, _), verification_results in zip(pending, results):
+                record["verify_ms"] = verify_ms
+                record["doc_type"] = verification_results["doc_type"]
+                record["status"] = verification_results["verification_status"]
+                record["failure_reasons"] = verification_results["failure_reasons"]
+                if record["status"] == "Verified":
+                    store_futures.append(executor.submit(store_queued_document, record, key))
+                else:
+                    finish(record)
+            pending.clear()
+
+        pending = []
+        for future in as_completed([executor.submit(ocr_queued_document, name) for name in file_names]):
+            record, extracted_text = future.result()
+            if extracted_text is None:
+                finish(record)
+                continue
+            pending.append((record, extracted_text))
+            if len(pending) >= NLP_BATCH_SIZE:
+                verify(pending)
+        if pending:
+            verify(pending)
+        for future in as_completed(store_futures):
+            finish(future.result())
+
+    elapsed = time.perf_counter() - started
+    summary = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+    print(f"\n✅ Done in {elapsed:.1f}s ({len(file_names) / elapsed:.1f} files/s). {summary}")
+    print(f"Report written to '{report_path}'.")
+    return 1 if counts.get("Error") else 0
+
 def main():
     """Main function to run the CLI application."""
     if not authenticate_user():
         return
 
+    # Load the NLP model in the background while the menu is shown, so the first verification doesn't wait
+    threading.Thread(target=get_nlp, daemon=True).start()
+
     while True:
+        event_log.flush()  # Log lines from the last action go out before the menu, not after it
         print("\n--- Smart Bank Main Menu ---")
         print("1. Verify a Document")
         print("2. Decrypt a Processed Document")
-        print("3. Generate/Reset Encryption Key")
-        print("4. Exit")
-        choice = input("Select an option (1-4): ")
+        print("3. Generate a New Encryption Key")
+        print("4. Re-encrypt Processed Documents with the Newest Key")
+        print("5. Exit")
+        choice = input("Select an option (1-5): ")
 
         if choice == '1':
             handle_document_processing()
@@ -208,10 +436,29 @@ def main():
         elif choice == '3':
             generate_key()
         elif choice == '4':
+            rotate_processed_documents(os.cpu_count() or 1)
+        elif choice == '5':
             print("\nGoodbye!")
             break
         else:
             print("\nInvalid option, please try again.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Smart Bank document verification.")
+    parser.add_argument("--batch", action="store_true",
+                        help=f"verify every file in '{DOCS_TO_PROCESS_DIR}' non-interactively")
+    parser.add_argument("--rotate", action="store_true",
+                        help=f"re-encrypt every file in '{PROCESSED_DIR}' with the newest key")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes for --batch/--rotate (default: CPU count)")
+    parser.add_argument("--report", default=f"batch_report_{time.strftime('%Y%m%d_%H%M%S')}.jsonl",
+                        help="JSONL report file for --batch")
+    args = parser.parse_args()
+
+    if (args.batch or args.rotate) and not authenticate_user(BATCH_USERNAME, BATCH_PASSWORD):
+        sys.exit(1)
+    if args.batch:
+        sys.exit(run_batch(args.workers, args.report))
+    if args.rotate:
+        sys.exit(rotate_processed_documents(args.workers))
     main()
@@ -550,14 +550,20 @@
     
     
     
-from flask import Flask, request, session, redirect, render_template_string
+from flask import Flask, Response, request, session, redirect, render_template, jsonify, g
 import os
 import json
+import time
 from datetime import datetime
 
 app = Flask(__name__)
 app.secret_key = "chatbot_secret_key"  # Secret key for session management
 
+# ✅ Session data (step, extracted details) lives server-side, the cookie only carries a signed session id
+from session_store import ServerSideSessionInterface, make_session_store
+
+app.session_interface = ServerSideSessionInterface(make_session_store())
+
 UPLOAD_FOLDER = 'uploaded_documents'
 VIDEO_UPLOAD_FOLDER = 'uploaded_videos'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -566,10 +572,23 @@ os.makedirs(VIDEO_UPLOAD_FOLDER, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['VIDEO_UPLOAD_FOLDER'] = VIDEO_UPLOAD_FOLDER
 
+# ✅ Page templates live in templates/ (compiled once, see precompile_templates) and the stylesheet
+# in static/chatbot.css, served with ETag/Last-Modified and browser caching
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = int(os.environ.get("STATIC_MAX_AGE", 3600))
+
+# ✅ Videos are served by media.send_media: HTTP Range requests (seeking), revalidation and zero-copy under gunicorn
+from media import send_media
+
+# ✅ Uploads are streamed to disk in chunks (hashed on the fly) with per-step size limits
+from uploads import StreamingUploadRequest, save_upload, upload_path, DOCUMENT_MAX_BYTES, VIDEO_MAX_BYTES, MULTIPART_OVERHEAD
+
+app.request_class = StreamingUploadRequest
+app.config['MAX_CONTENT_LENGTH'] = max(DOCUMENT_MAX_BYTES, VIDEO_MAX_BYTES) + MULTIPART_OVERHEAD
+
 # Define chatbot flow
 CHATBOT_FLOW = [
     {"type": "text", "content": "Welcome to the Education Loan Application Chatbot! Let's proceed step by step."},
-    {"type": "video", "content": "Please watch this introductory video before proceeding.", "video_url": "/static/intro_video.mp4", "summary_content": "To apply for an education loan, you need to follow these steps:<br>1. Check Eligibility: Secure admission to a recognized institution.<br>2. Choose Loan Type: Secured (with collateral) or Unsecured (without collateral).<br>3. Submit Required Documents: Identity proof, admission letter, fee structure, etc."},
+    {"type": "video", "content": "Please watch this introductory video before proceeding.", "video_url": "/media/intro_video.mp4", "summary_content": "To apply for an education loan, you need to follow these steps:<br>1. Check Eligibility: Secure admission to a recognized institution.<br>2. Choose Loan Type: Secured (with collateral) or Unsecured (without collateral).<br>3. Submit Required Documents: Identity proof, admission letter, fee structure, etc."},
     {"type": "document", "content": "Please upload your Aadhaar Card for identity and address proof."},
     {"type": "document", "content": "Please upload your PAN Card for tax and identity verification."},
     {"type": "document", "content": "Please upload your 10th Certificate."},
@@ -589,202 +608,228 @@ CHATBOT_FLOW = [
 ]
 
 # Helper function to save files to disk and JSON
-import fitz  # PyMuPDF for PDFs
-import spacy
-import re
+# ✅ PyMuPDF, Tesseract and PIL are imported on first use (see ocr_engine) and spaCy isn't
+# loaded at all since extraction is regex based, so importing the app stays fast
+
+import ocr_engine
 
-nlp = spacy.load("en_core_web_sm")
+# Page-parallel OCR settings (defaults come from the OCR_WORKERS / OCR_DPI environment variables)
+app.config['OCR_WORKERS'] = ocr_engine.OCR_WORKERS
+app.config['OCR_DPI'] = ocr_engine.OCR_DPI
 
-def extract_text_from_pdf(pdf_path):
-    """Extracts text from a PDF file using PyMuPDF."""
-    text = ""
-    doc = fitz.open(pdf_path)
-    for page in doc:
-        text += page.get_text("text")
-    return text
+def extract_text_hybrid(pdf_path, doc_type=None):
+    """Extracts text per page: PyMuPDF text layer when present, OCR for image-only pages.
 
-import pytesseract
-from pdf2image import convert_from_path
+    Scanned pages are deskewed/thresholded/cropped and OCRed with the Tesseract mode suited to doc_type.
+    """
+    return ocr_engine.extract_pdf_text(pdf_path, workers=app.config['OCR_WORKERS'], dpi=app.config['OCR_DPI'],
+                                       doc_type=doc_type)
 
-# Set Tesseract path if necessary (Windows users)
-# pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+from field_extraction import extract_fields, NOT_FOUND
+from doc_cache import DocumentCache, file_digest
+from metadata_store import MetadataStore
+from job_queue import JobQueue, DONE, FAILED
+import video_pipeline
+import metrics
+import event_log
 
-def extract_text_with_ocr(pdf_path):
-    """Extracts text from scanned PDFs using OCR."""
-    images = convert_from_path(pdf_path)
-    text = "\n".join([pytesseract.image_to_string(img) for img in images])
-    return text
+log = event_log.get_logger("app")
 
-import re
+# Content-addressed cache of extracted text/fields (SQLite on disk, LRU in memory)
+document_cache = DocumentCache()
+
+# ✅ One row per upload in SQLite instead of rewriting files_data.json (import old records with metadata_store.py)
+metadata_store = MetadataStore()
 
 def extract_details(text, doc_type):
     """Extracts relevant details based on document type."""
-    extracted_data = {
-        "Full Name": "Not Found",
-        "DOB": "Not Found",
-        "Gender": "Not Found",
-        "Address": "Not Found",
-        "Aadhaar Number": "Not Found",
-        "PAN Number": "Not Found",
-        "Signature": "Not Found",
-        "Tax Status": "Not Found",
-        "School Name": "Not Found",
-        "Year of Completion": "Not Found",
-        "Marks": "Not Found",
-        "Degree & Major": "Not Found",
-        "University Name": "Not Found",
-        "CGPA/Marks": "Not Found",
-        "Total Fees": "Not Found",
-        "Payment Deadlines": "Not Found",
-        "Course Duration": "Not Found",
-        "Installment Info": "Not Found",
-        "Applicant Income": "Not Found",
-        "Employer Details": "Not Found",
-        "Salary Slips/Tax Returns": "Not Found",
-        "Co-Applicant Income": "Not Found",
-        "Property Details": "Not Found",
-        "Market Value": "Not Found",
-        "Ownership Proof": "Not Found",
-        "Legal Documents": "Not Found",
-        "Mortgage Details": "Not Found"
-    }
-
-    # ✅ Initialize regex match variables to avoid UnboundLocalError
-    name_match = dob_match = gender_match = address_match = aadhaar_match = None
-    pan_match = signature_match = tax_status_match = school_match = year_match = marks_match = None
-    degree_match = university_match = cgpa_match = fee_match = payment_match = None
-    duration_match = installment_match = income_match = employer_match = salary_match = None
-    co_income_match = property_match = market_value_match = ownership_match = None
-    legal_docs_match = mortgage_match = None
-
-    # ✅ Aadhaar Card Extraction
-    if "Aadhaar" in doc_type:
-        name_match = re.search(r"Full Name[:\s]+([\w\s]+)", text, re.IGNORECASE)
-        dob_match = re.search(r'\b(\d{2}/\d{2}/\d{4})\b', text)
-        gender_match = re.search(r"\b(Male|Female|Other)\b", text, re.IGNORECASE)
-        address_match = re.search(r"Address[:\s]+([\w\s,]+)", text, re.IGNORECASE)
-        aadhaar_match = re.search(r'\b\d{4}\s\d{4}\s\d{4}\b', text)
-
-    # ✅ PAN Card Extraction
-    elif "PAN" in doc_type:
-        name_match = re.search(r"Name[:\s]+([\w\s]+)", text, re.IGNORECASE)
-        dob_match = re.search(r'\b(\d{2}/\d{2}/\d{4})\b', text)
-        pan_match = re.search(r'[A-Z]{5}[0-9]{4}[A-Z]', text)
-        signature_match = re.search(r"Signature[:\s]+([\w\s]+)", text, re.IGNORECASE)
-        tax_status_match = re.search(r"Tax Status[:\s]+([\w\s]+)", text, re.IGNORECASE)
-
-    # ✅ 10th & 12th Certificates Extraction
-    elif "10th Certificate" in doc_type or "12th Certificate" in doc_type:
-        name_match = re.search(r"Name[:\s]+([\w\s]+)", text, re.IGNORECASE)
-        dob_match = re.search(r'\b(\d{2}/\d{2}/\d{4})\b', text)
-        school_match = re.search(r"School[:\s]+([\w\s]+)", text, re.IGNORECASE)
-        year_match = re.search(r"Year of Completion[:\s]+(\d{4})", text)
-        marks_match = re.search(r"Marks[:\s]+([\d./]+)", text)
-
-    # ✅ UG Certificate Extraction
-    elif "UG Certificate" in doc_type:
-        name_match = re.search(r"Name[:\s]+([\w\s]+)", text, re.IGNORECASE)
-        degree_match = re.search(r"Degree[:\s]+([\w\s]+)", text, re.IGNORECASE)
-        university_match = re.search(r"University[:\s]+([\w\s]+)", text, re.IGNORECASE)
-        year_match = re.search(r"Year of Completion[:\s]+(\d{4})", text)
-        cgpa_match = re.search(r"CGPA[:\s]+([\d./]+)", text)
-
-    # ✅ Course Fee Structure Extraction
-    elif "Course Fee Structure" in doc_type:
-        fee_match = re.search(r"(Total Fees|Fees Payable)[:\s]+([\d,]+)", text, re.IGNORECASE)
-        payment_match = re.search(r"(Payment Due Date|Payment Deadlines)[:\s]+([\w\s,]+)", text, re.IGNORECASE)
-        duration_match = re.search(r"(Course Duration|Program Length)[:\s]+([\w\s]+)", text, re.IGNORECASE)
-        installment_match = re.search(r"(Installment Amount|Installment Info)[:\s]+([\w\s,]+)", text, re.IGNORECASE)
-
-        print("\n🛠 Extracted Course Fee Structure Info:")  # ✅ Debugging
-        print("Total Fees:", fee_match.group(2) if fee_match else "Not Found")
-        print("Payment Deadlines:", payment_match.group(2) if payment_match else "Not Found")
-        print("Course Duration:", duration_match.group(2) if duration_match else "Not Found")
-        print("Installments:", installment_match.group(2) if installment_match else "Not Found")
-
-
-    # ✅ Income Proof Extraction
-    elif "Income Proof" in doc_type:
-        income_match = re.search(r"Applicant Income[:\s]+([\d,]+)", text, re.IGNORECASE)
-        employer_match = re.search(r"Employer[:\s]+([\w\s]+)", text, re.IGNORECASE)
-        salary_match = re.search(r"Salary[:\s]+([\d,]+)", text, re.IGNORECASE)
-        co_income_match = re.search(r"Co-Applicant Income[:\s]+([\d,]+)", text, re.IGNORECASE)
-
-    # ✅ Collateral Documents Extraction
-    elif "Collateral" in doc_type:
-        property_match = re.search(r"Property Details[:\s]+([\w\s,]+)", text, re.IGNORECASE)
-        market_value_match = re.search(r"Market Value[:\s]+([\d,]+)", text, re.IGNORECASE)
-        ownership_match = re.search(r"Ownership Proof[:\s]+([\w\s,]+)", text, re.IGNORECASE)
-        legal_docs_match = re.search(r"Legal Documents[:\s]+([\w\s,]+)", text, re.IGNORECASE)
-        mortgage_match = re.search(r"Mortgage[:\s]+([\w\s,]+)", text, re.IGNORECASE)
-
-    # ✅ Assign extracted values only if match is found
-    extracted_data["Full Name"] = name_match.group(1).strip() if name_match else "Not Found"
-    extracted_data["DOB"] = dob_match.group(1).strip() if dob_match else "Not Found"
-    extracted_data["Gender"] = gender_match.group(1).strip() if gender_match else "Not Found"
-    extracted_data["Address"] = address_match.group(1).strip() if address_match else "Not Found"
-    extracted_data["Aadhaar Number"] = aadhaar_match.group(0).strip() if aadhaar_match else "Not Found"
-    extracted_data["PAN Number"] = pan_match.group(0).strip() if pan_match else "Not Found"
-    extracted_data["Signature"] = signature_match.group(1).strip() if signature_match else "Not Found"
-    extracted_data["Tax Status"] = tax_status_match.group(1).strip() if tax_status_match else "Not Found"
-    extracted_data["School Name"] = school_match.group(1).strip() if school_match else "Not Found"
-    extracted_data["Year of Completion"] = year_match.group(1).strip() if year_match else "Not Found"
-    extracted_data["Marks"] = marks_match.group(1).strip() if marks_match else "Not Found"
-    extracted_data["Degree & Major"] = degree_match.group(1).strip() if degree_match else "Not Found"
-    extracted_data["University Name"] = university_match.group(1).strip() if university_match else "Not Found"
-    extracted_data["CGPA/Marks"] = cgpa_match.group(1).strip() if cgpa_match else "Not Found"
-
-    # ✅ Course Fee Structure Extraction
-    extracted_data["Total Fees"] = fee_match.group(2).strip() if fee_match else "Not Found"
-    extracted_data["Payment Deadlines"] = payment_match.group(2).strip() if payment_match else "Not Found"
-    extracted_data["Course Duration"] = duration_match.group(2).strip() if duration_match else "Not Found"
-    extracted_data["Installment Info"] = installment_match.group(2).strip() if installment_match else "Not Found"
-
-    # ✅ Income Proof Extraction
-    extracted_data["Applicant Income"] = income_match.group(1).strip() if income_match else "Not Found"
-    extracted_data["Employer Details"] = employer_match.group(1).strip() if employer_match else "Not Found"
-    extracted_data["Salary Slips/Tax Returns"] = salary_match.group(1).strip() if salary_match else "Not Found"
-    extracted_data["Co-Applicant Income"] = co_income_match.group(1).strip() if co_income_match else "Not Found"
-
-    # ✅ Collateral Documents Extraction
-    extracted_data["Property Details"] = property_match.group(1).strip() if property_match else "Not Found"
-    extracted_data["Market Value"] = market_value_match.group(1).strip() if market_value_match else "Not Found"
-    extracted_data["Ownership Proof"] = ownership_match.group(1).strip() if ownership_match else "Not Found"
-    extracted_data["Legal Documents"] = legal_docs_match.group(1).strip() if legal_docs_match else "Not Found"
-    extracted_data["Mortgage Details"] = mortgage_match.group(1).strip() if mortgage_match else "Not Found"
+    with metrics.timer("regex_extraction", doc_type):
+        extracted_data = extract_fields(text, doc_type)
 
+    if "Course Fee Structure" in doc_type:
+        log.debug("🛠 Extracted Course Fee Structure Info: Total Fees %s, Payment Deadlines %s, Course Duration %s, "
+                  "Installments %s", extracted_data["Total Fees"], extracted_data["Payment Deadlines"],
+                  extracted_data["Course Duration"], extracted_data["Installment Info"],
+                  extra={"event": "extracted_fields"})
 
     return extracted_data
 
 
 
-def save_file_to_json(file, folder, file_type, doc_type):
-    """Saves file and extracts data (handles OCR for scanned documents)."""
-    file_path = os.path.join(folder, file.filename)
-    file.save(file_path)
-
-    # ✅ Detect if the PDF is scanned and apply OCR
-    extracted_text = extract_text_from_pdf(file_path)
-    if len(extracted_text.strip()) < 10:  # If text extraction fails, use OCR
-        extracted_text = extract_text_with_ocr(file_path)
-
-    print("\n🔍 Extracted Text from PDF (Before Regex):\n", extracted_text)  # ✅ Debugging
-    print("📌 Detected Document Type:", doc_type)  # ✅ Debugging
-
-    extracted_data = extract_details(extracted_text, doc_type)
+def process_saved_document(file_path, file_type, doc_type, digest=None, applicant=None, filename=None, size=None):
+    """Extracts data from an uploaded file already on disk (handles OCR for scanned documents) and records it.
+
+    filename is the name the client uploaded the file as (file_path is the server-side name).
+    """
+    # ✅ Per-stage timings (text layer, rasterize, Tesseract, regex...) are recorded by the stages themselves
+    with metrics.timer("document_total", doc_type):
+        return _process_saved_document(file_path, file_type, doc_type, digest, applicant, filename, size)
+
+
+def _process_saved_document(file_path, file_type, doc_type, digest, applicant, filename, size):
+    # ✅ Re-uploads of the same file skip text extraction/OCR and regex extraction
+    digest = digest or file_digest(file_path)
+    dpi = app.config['OCR_DPI']
+    fields_profile = ocr_engine.fields_profile(doc_type)
+    extracted_data = document_cache.get_fields(digest, doc_type, dpi, fields_profile)
+    if extracted_data is None:
+        # ✅ Scanned Aadhaar/PAN cards: the name/DOB/number are OCRed from their regions of the card
+        card_fields = ocr_engine.read_card_fields(file_path, doc_type)
+        extracted_data = card_fields
+        if card_fields is None or NOT_FOUND in card_fields.values():
+            # Fields the card regions don't cover (e.g. the Aadhaar address) still come from the full text
+            ocr_profile = ocr_engine.ocr_profile(doc_type)
+            extracted_text = document_cache.get_text(digest, dpi, ocr_profile)
+            if extracted_text is None:
+                # ✅ Use the PDF text layer where a page has one, OCR only the scanned pages
+                extracted_text = extract_text_hybrid(file_path, doc_type)
+                document_cache.set_text(digest, dpi, extracted_text, ocr_profile)
+
+            # ✅ Sampled, size-capped and redacted (Aadhaar/PAN numbers masked), written off the request thread
+            log.debug("🔍 Extracted Text (Before Regex) of %s: %s", doc_type, event_log.excerpt(extracted_text),
+                      extra={"event": "extracted_text"})
+
+            extracted_data = extract_details(extracted_text, doc_type)
+            if card_fields is not None:
+                from card_ocr import merge_fields
+                extracted_data = merge_fields(card_fields, extracted_data)
+        document_cache.set_fields(digest, doc_type, extracted_data, dpi, fields_profile)
 
     file_data = {
-        'filename': file.filename,
+        'filename': filename or os.path.basename(file_path),
         'file_path': file_path,
         'file_type': file_type,
         'doc_type': doc_type,
+        'sha256': digest,
+        'size': size if size is not None else os.path.getsize(file_path),
         'timestamp': datetime.now().isoformat(),
         'extracted_data': extracted_data
     }
 
+    metadata_store.add(file_data, applicant)
     return file_data
 
 
+def save_file_to_json(file, folder, file_type, doc_type, applicant=None):
+    """Saves file and extracts data (handles OCR for scanned documents)."""
+    file_path = upload_path(folder, applicant, file.filename)
+    digest, size = save_upload(file, file_path)
+    return process_saved_document(file_path, file_type, doc_type, digest, applicant, file.filename, size)
+
+
+# Uploaded documents are processed by background worker processes; the page polls the job status
+document_jobs = JobQueue(process_saved_document)
+# The page stops polling after this long and asks for the document again (a stale job is re-queued within ~1.5 min)
+JOB_POLL_SECONDS = int(os.environ.get("JOB_POLL_SECONDS", 300))
+
+
+def verify_kyc_face(video_path, applicant, duration=None):
+    """Face-matches the KYC video against the photo on the applicant's Aadhaar card (or else PAN card).
+
+    The status is only match/no_match with the SFace model installed, otherwise low_confidence (see face_match).
+    """
+    import face_match
+
+    result = None
+    for doc_type in ("Aadhaar Card", "PAN Card"):
+        records = metadata_store.find(applicant=applicant, doc_type=doc_type, limit=1)
+        if not records or not os.path.exists(records[0]['file_path']):
+            continue
+        result = dict(face_match.verify_video(video_path, records[0]['file_path'], doc_type, duration=duration),
+                      reference=doc_type)
+        if result["status"] != face_match.NO_REFERENCE_FACE:
+            break
+    log.info("🪪 KYC face match: %s", result['status'] if result else 'no Aadhaar/PAN uploaded')
+    return result
+
+
+def process_saved_video(file_path, doc_type, digest, size, timestamp, applicant=None, filename=None):
+    """Probes an uploaded video and renders its keyframes, poster and preview (and face-matches KYC videos).
+
+    The results are stored with the video's upload record.
+    """
+    # Renditions are kept per content digest next to (never instead of) the original upload
+    renditions = video_pipeline.process_video(
+        file_path, os.path.join(video_pipeline.VIDEO_RENDITION_FOLDER, digest)
+    )
+    if "KYC" in doc_type:
+        renditions = dict(renditions, face_match=verify_kyc_face(file_path, applicant, renditions["probe"]["duration"]))
+    metadata_store.add({
+        'filename': filename, 'file_path': file_path, 'file_type': 'video', 'doc_type': doc_type, 'sha256': digest,
+        'size': size, 'timestamp': timestamp, 'extracted_data': renditions,
+    }, applicant)
+    return renditions
+
+
+# ✅ Uploaded videos are post-processed (probe, keyframes, poster, low-bitrate preview) by their own workers
+video_jobs = JobQueue(
+    process_saved_video, db_path=video_pipeline.VIDEO_JOB_DB, workers=video_pipeline.VIDEO_WORKERS
+)
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Reports the status (and result once done) of a document processing job."""
+    job = document_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job)
+
+
+@app.errorhandler(413)
+def upload_too_large(error):
+    """Shown when an upload exceeds the size limit of its step."""
+    return render_template("upload_too_large.html", message=error.description), 413
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Per-stage latency histograms by document type, in the Prometheus text format."""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@app.route('/cache_stats')
+def cache_stats():
+    """Reports hit/miss counters of the document cache, summed over the web and job worker processes."""
+    return jsonify(document_cache.stats())
+
+
+@app.route('/documents')
+def documents():
+    """Lists the current applicant's uploaded documents (optionally filtered by ?doc_type= or ?filename=)."""
+    return jsonify(metadata_store.find(
+        applicant=session.sid, filename=request.args.get('filename'), doc_type=request.args.get('doc_type')
+    ))
+
+
+@app.route('/media/<path:filename>')
+def media(filename):
+    """Serves the intro video (and other media in static/) with Range support for seeking."""
+    return send_media(app.static_folder, filename)
+
+
+@app.route('/uploads/videos/<path:filename>')
+def uploaded_video(filename):
+    """Plays back the current applicant's latest video uploaded as `filename` (other applicants' are not found)."""
+    records = metadata_store.find(applicant=session.sid, filename=filename, limit=1)
+    if not records or records[0]["file_type"] != "video":
+        return jsonify({"error": "Unknown video"}), 404
+    # Served from the record's server-side path, the URL only names the applicant's own upload
+    path = records[0]["file_path"]
+    return send_media(os.path.dirname(path), os.path.basename(path), private=True)
+
+
+@app.route('/uploads/video_renditions/<any(poster, preview):rendition>/<path:filename>')
+def uploaded_video_rendition(rendition, filename):
+    """Poster image or low-bitrate preview of the current applicant's uploaded video, once processed."""
+    records = metadata_store.find(applicant=session.sid, filename=filename, limit=1)
+    renditions = records[0]["extracted_data"] if records else None
+    if not renditions or not renditions.get(rendition):
+        return jsonify({"error": "No such rendition (yet)"}), 404
+    path = renditions[rendition]
+    return send_media(os.path.dirname(path), os.path.basename(path), private=True)
+
+
 @app.route('/', methods=['GET', 'POST'])
 def chatbot():
     if 'step' not in session:
@@ -796,107 +841,36 @@ def chatbot():
     # If all steps are completed, display the eligibility message
     if step >= len(CHATBOT_FLOW):
         session.clear()  # Clear session to restart the process
-        eligibility_message = "<h3>You are eligible to apply!</h3>"  # Eligibility message
-        return render_template_string(f"""
-        <html>
-        <head>
-            <title>Education Loan Chatbot</title>
-            <style>
-                /* Add your styling here */
-                body {{
-                    font-family: Arial, sans-serif;
-                    background-color: #f4f4f9;
-                    margin: 0;
-                    padding: 0;
-                }}
-                h2 {{
-                    text-align: center;
-                    margin-top: 20px;
-                    color: #2e3b4e;
-                }}
-                .container {{
-                    width: 60%;
-                    margin: auto;
-                    background-color: #fff;
-                    padding: 20px;
-                    border-radius: 10px;
-                    box-shadow: 0 2px 10px rgba(0, 0, 0, 0.1);
-                }}
-            </style>
-        </head>
-        <body>
-            <h2>Education Loan Chatbot</h2>
-            <div class="container">
-                {eligibility_message}
-            </div>
-        </body>
-        </html>
-        """)  # Display the eligibility message
+        return render_template("complete.html")  # Display the eligibility message
 
     current_step = CHATBOT_FLOW[step]
     extracted_data = session.get("extracted_data", {})  # Retrieve stored extracted data
 
-    content = ""  # Initialize content to avoid UnboundLocalError
     show_next_button = False  # Initially hide the "Next" button
     video_preview_url = None  # Initialize video preview URL to None
 
-    # Step Type Handling
-    if current_step["type"] == "text":
-        content = f"<p>{current_step['content']}</p>"
-
-    elif current_step["type"] == "video":
-        if "video_url" in current_step:
-            content = f"""
-                <p>{current_step['content']}</p>
-                <video width='640' height='360' controls>
-                    <source src='{current_step['video_url']}' type='video/mp4'>
-                    Your browser does not support the video tag.
-                </video>
-                <div style='margin-top: 10px;'>
-                    <button id='toggle-summary' onclick='toggleSummary()' class="btn">Summarise</button>
-                    <div id='summary' style='display:none; margin-top: 10px;'>
-                        <p>{current_step['summary_content']}</p>
-                    </div>
-                </div>
-                <form method='POST'>
-                    <button type='submit' name='next' value='true' class="btn primary">Next</button>
-                </form>
-                <script>
-                    function toggleSummary() {{
-                        var summary = document.getElementById('summary');
-                        summary.style.display = summary.style.display === 'none' ? 'block' : 'none';
-                    }}
-                </script>
-            """
-        else:
-            content = f"""
-                <p>{current_step['content']}</p>
-                <form method="POST" enctype="multipart/form-data">
-                    <input type="file" name="video" accept="video/*" required class="input">
-                    <button type="submit" class="btn primary">Upload Video</button>
-                </form>
-            """
-
+    # Step Type Handling: each step type is rendered by its own template fragment
+    if current_step["type"] == "video":
+        step_template = "intro_video.html" if "video_url" in current_step else "video_upload.html"
     elif current_step["type"] in ["document", "optional_document"]:
-        content = f"""
-            <p>{current_step['content']}</p>
-            <form method="POST" enctype="multipart/form-data" class="upload-form">
-                <input type="file" name="document" required class="input">
-                <button type="submit" class="btn primary">Upload</button>
-            </form>
-        """
-        if current_step["type"] == "optional_document":
-            content += """
-                <form method="POST">
-                    <button type="submit" name="skip" value="true" class="btn secondary">Skip</button>
-                </form>
-            """
+        step_template = "document.html"
+    else:
+        step_template = "text.html"
 
     # Handling form submissions
     if request.method == 'POST':
+        # ✅ Pick the upload folder and size limit for this step before the form is parsed
+        if current_step["type"] == "video":
+            request.limit_uploads(VIDEO_UPLOAD_FOLDER, VIDEO_MAX_BYTES)
+        elif current_step["type"] in ["document", "optional_document"]:
+            request.limit_uploads(UPLOAD_FOLDER, DOCUMENT_MAX_BYTES)
+
+        upload_started = time.perf_counter()  # Parsing the form streams any upload to disk
         if "next" in request.form:  # Move to next step only when "Next" is clicked
             session['step'] += 1  # Increment step
             session.pop("extracted_data", None)  # Clear extracted data after proceeding
+            session.pop("job_id", None)
+            session.pop("document_processed", None)
             return redirect('/')  # Redirect to the next page
 
         if current_step["type"] in ["document", "optional_document"]:
@@ -907,151 +881,100 @@ def chatbot():
             uploaded_file = request.files.get('document')
             if uploaded_file:
                 doc_type = current_step["content"].replace("Please upload your ", "").split(" for")[0].strip(".")
-                print(f"\n📌 Detected Document Type: {doc_type}")  # Debugging
-
-                file_data = save_file_to_json(uploaded_file, UPLOAD_FOLDER, 'document', doc_type)
-
-                # Preserve previous extracted data instead of overwriting
-                extracted_data.update(file_data.get("extracted_data", {}))
-                session["extracted_data"] = extracted_data  # Store in session
-
-                show_next_button = True  # Show "Next" button after upload
+                log.debug("📌 Detected Document Type: %s", doc_type)
+
+                # ✅ Stored under a unique server-side name, the client's filename is only kept in the metadata
+                file_path = upload_path(UPLOAD_FOLDER, session.sid, uploaded_file.filename)
+                digest, size = save_upload(uploaded_file, file_path)
+                metrics.observe("upload_write", time.perf_counter() - upload_started, doc_type)
+                g.doc_type = doc_type  # Labels this request's session write
+
+                # ✅ OCR and extraction run in a background worker, the page polls the job until it's done
+                session['job_id'] = document_jobs.submit(
+                    file_path=file_path, file_type='document', doc_type=doc_type, digest=digest,
+                    applicant=session.sid, filename=uploaded_file.filename, size=size
+                )
+                session.pop('document_processed', None)
+                return redirect('/')
 
         elif current_step["type"] == "video":
             uploaded_video = request.files.get('video')
             if uploaded_video:
-                video_file_path = os.path.join(VIDEO_UPLOAD_FOLDER, uploaded_video.filename)
-                uploaded_video.save(video_file_path)
-
-                # Set the video preview URL to the saved file path
+                video_file_path = upload_path(VIDEO_UPLOAD_FOLDER, session.sid, uploaded_video.filename)
+                digest, size = save_upload(uploaded_video, video_file_path)
+                metrics.observe("upload_write", time.perf_counter() - upload_started, current_step["content"])
+                g.doc_type = current_step["content"]
+                timestamp = datetime.now().isoformat()
+                metadata_store.add({
+                    'filename': uploaded_video.filename, 'file_path': video_file_path, 'file_type': 'video',
+                    'doc_type': current_step["content"], 'sha256': digest, 'size': size, 'timestamp': timestamp,
+                }, session.sid)
+                # The job fills in the same record (same applicant, path and timestamp) once it's done
+                video_jobs.submit(
+                    file_path=video_file_path, doc_type=current_step["content"], digest=digest, size=size,
+                    timestamp=timestamp, applicant=session.sid, filename=uploaded_video.filename
+                )
+
+                # Preview URL by the uploaded filename, resolved to the saved file through the metadata record
                 video_preview_url = f"/uploads/videos/{uploaded_video.filename}"
                 show_next_button = True  # Show "Next" button after video upload
 
-    # Display only found extracted details (hide "Not Found" values)
-    if extracted_data:
-        content += "<h3>Extracted Details:</h3><ul>"
-        for key, value in extracted_data.items():
-            if value and value != "Not Found":
-                content += f"<li><strong>{key}:</strong> {value}</li>"
-        content += "</ul>"
-
-    # Show "Next" button only on the first page and after file/video upload
-    if show_next_button or step == 0:
-        content += """
-            <form method="POST">
-                <button type="submit" name="next" value="true" class="btn primary">Next</button>
-            </form>
-        """
+    # Background document processing: show progress until the job is done, then merge its results
+    job_id = session.get('job_id')
+    job_failed = False
+    if job_id:
+        job = document_jobs.get(job_id)
+        if job is None or job["status"] == FAILED:
+            session.pop('job_id')
+            job_id = None
+            job_failed = True
+        elif job["status"] == DONE:
+            session.pop('job_id')
+            job_id = None
+            # Preserve previous extracted data instead of overwriting
+            extracted_data.update(job["result"].get("extracted_data", {}))
+            session["extracted_data"] = extracted_data  # Store in session
+            session['document_processed'] = True
+
+    if session.get('document_processed'):
+        show_next_button = True  # Show "Next" button after the upload has been processed
 
     # Calculate progress bar width
     total_steps = len(CHATBOT_FLOW)
     progress = (step / total_steps) * 100
 
-    return render_template_string(f"""
-    <html>
-    <head>
-        <title>Education Loan Chatbot</title>
-        <style>
-            body {{
-                font-family: Arial, sans-serif;
-                background-color: #f4f4f9;
-                margin: 0;
-                padding: 0;
-            }}
-            h2 {{
-                text-align: center;
-                margin-top: 20px;
-                color: #2e3b4e;
-            }}
-            .container {{
-                width: 60%;
-                margin: auto;
-                background-color: #fff;
-                padding: 20px;
-                border-radius: 10px;
-                box-shadow: 0 2px 10px rgba(0, 0, 0, 0.1);
-            }}
-            .btn {{
-                padding: 10px 20px;
-                background-color: #007bff;
-                color: white;
-                border: none;
-                border-radius: 5px;
-                cursor: pointer;
-                font-size: 16px;
-                transition: background-color 0.3s ease;
-            }}
-            .btn.primary {{
-                background-color: #007bff;
-            }}
-            .btn.primary:hover {{
-                background-color: #0056b3;
-            }}
-            .btn.secondary {{
-                background-color: #6c757d;
-            }}
-            .btn.secondary:hover {{
-                background-color: #5a6268;
-            }}
-            .upload-form input {{
-                padding: 10px;
-                font-size: 16px;
-                margin: 10px 0;
-                width: 100%;
-                border: 1px solid #ccc;
-                border-radius: 5px;
-            }}
-            .input {{
-                padding: 10px;
-                font-size: 16px;
-                width: 100%;
-                border: 1px solid #ccc;
-                border-radius: 5px;
-            }}
-            .input[type="file"] {{
-                padding: 5px;
-            }}
-            .container h3 {{
-                margin-top: 30px;
-                color: #2e3b4e;
-            }}
-            .container ul {{
-                list-style-type: none;
-                padding: 0;
-            }}
-            .container ul li {{
-                background: #f8f9fa;
-                padding: 10px;
-                border-radius: 5px;
-                margin-bottom: 5px;
-            }}
-            /* Progress Bar */
-            .progress-bar-container {{
-                width: 100%;
-                height: 20px;
-                background-color: #e0e0e0;
-                border-radius: 10px;
-                margin-bottom: 20px;
-            }}
-            .progress-bar {{
-                height: 100%;
-                background-color: #28a745;
-                width: {progress}%;
-                border-radius: 10px;
-            }}
-        </style>
-    </head>
-    <body>
-        <h2>Education Loan Chatbot</h2>
-        <div class="container">
-            <div class="progress-bar-container">
-                <div class="progress-bar"></div>
-            </div>
-            {content}
-        </div>
-    </body>
-    </html>
-    """)
+    return render_template(
+        "chatbot.html",
+        current_step=current_step,
+        step_template=step_template,
+        extracted_data=extracted_data,
+        job_id=job_id,
+        job_failed=job_failed,
+        job_poll_seconds=JOB_POLL_SECONDS,
+        video_preview_url=video_preview_url,
+        # Show "Next" button only on the first page and after file/video upload
+        show_next_button=show_next_button or step == 0,
+        progress=progress,
+    )
+
+
+def precompile_templates():
+    """Loads (parses and compiles) every page template once so no request pays for it."""
+    for name in app.jinja_env.list_templates(extensions=["html"]):
+        app.jinja_env.get_template(name)
+
+
+precompile_templates()
+
+
+def warm_up():
+    """Imports the OCR libraries ahead of the first upload, e.g. in a prefork server's master process."""
+    ocr_engine.warm_up()
+    precompile_templates()
 
 if __name__ == '__main__':
+    # Development server only, use serve.py (gunicorn) in production
+    # Pick up uploads still queued when the server last stopped (only in the reloader's serving process)
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        document_jobs.resume()
     app.run(debug=True)
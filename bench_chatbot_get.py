@@ -0,0 +1,189 @@
+"""Benchmark: requests/sec for GET / (a document step with extracted details), before and after templates.
+
+"legacy" renders the page the way app.chatbot did before: an f-string with the
+inline stylesheet passed through render_template_string, so Jinja parses and
+compiles the page on every request. "templated" renders templates/chatbot.html
+(compiled once and cached). Both run in-process through Flask's test client.
+
+Run with: python bench_chatbot_get.py [seconds per mode]
+"""
+import os
+import sys
+import time
+
+from flask import Flask, render_template, render_template_string
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CURRENT_STEP = {"type": "document", "content": "Please upload your PAN Card for tax and identity verification."}
+EXTRACTED_DATA = {
+    "Full Name": "JOHN DOE", "DOB": "01/01/1990", "PAN Number": "ABCDE1234F",
+    "Signature": "Not Found", "Tax Status": "Individual",
+}
+PROGRESS = 3 / 16 * 100
+
+app = Flask(__name__, template_folder=os.path.join(HERE, "templates"), static_folder=os.path.join(HERE, "static"))
+
+
+@app.route("/legacy")
+def legacy():
+    current_step, extracted_data, progress = CURRENT_STEP, EXTRACTED_DATA, PROGRESS
+    content = f"""
+            <p>{current_step['content']}</p>
+            <form method="POST" enctype="multipart/form-data" class="upload-form">
+                <input type="file" name="document" required class="input">
+                <button type="submit" class="btn primary">Upload</button>
+            </form>
+        """
+    content += "<h3>Extracted Details:</h3><ul>"
+    for key, value in extracted_data.items():
+        if value and value != "Not Found":
+            content += f"<li><strong>{key}:</strong> {value}</li>"
+    content += "</ul>"
+
+    return render_template_string(f"""
+    <html>
+    <head>
+        <title>Education Loan Chatbot</title>
+        <style>
+            body {{
+                font-family: Arial, sans-serif;
+                background-color: #f4f4f9;
+                margin: 0;
+                padding: 0;
+            }}
+            h2 {{
+                text-align: center;
+                margin-top: 20px;
+                color: #2e3b4e;
+            }}
+            .container {{
+                width: 60%;
+                margin: auto;
+                background-color: #fff;
+                padding: 20px;
+                border-radius: 10px;
+                box-shadow: 0 2px 10px rgba(0, 0, 0, 0.1);
+            }}
+            .btn {{
+                padding: 10px 20px;
+                background-color: #007bff;
+                color: white;
+                border: none;
+                border-radius: 5px;
+                cursor: pointer;
+                font-size: 16px;
+                transition: background-color 0.3s ease;
+            }}
+            .btn.primary {{
+                background-color: #007bff;
+            }}
+            .btn.primary:hover {{
+                background-color: #0056b3;
+            }}
+            .btn.secondary {{
+                background-color: #6c757d;
+            }}
+            .btn.secondary:hover {{
+                background-color: #5a6268;
+            }}
+            .upload-form input {{
+                padding: 10px;
+                font-size: 16px;
+                margin: 10px 0;
+                width: 100%;
+                border: 1px solid #ccc;
+                border-radius: 5px;
+            }}
+            .input {{
+                padding: 10px;
+                font-size: 16px;
+                width: 100%;
+                border: 1px solid #ccc;
+                border-radius: 5px;
+            }}
+            .input[type="file"] {{
+                padding: 5px;
+            }}
+            .container h3 {{
+                margin-top: 30px;
+                color: #2e3b4e;
+            }}
+            .container ul {{
+                list-style-type: none;
+                padding: 0;
+            }}
+            .container ul li {{
+                background: #f8f9fa;
+                padding: 10px;
+                border-radius: 5px;
+                margin-bottom: 5px;
+            }}
+            /* Progress Bar */
+            .progress-bar-container {{
+                width: 100%;
+                height: 20px;
+                background-color: #e0e0e0;
+                border-radius: 10px;
+                margin-bottom: 20px;
+            }}
+            .progress-bar {{
+                height: 100%;
+                background-color: #28a745;
+                width: {progress}%;
+                border-radius: 10px;
+            }}
+        </style>
+    </head>
+    <body>
+        <h2>Education Loan Chatbot</h2>
+        <div class="container">
+            <div class="progress-bar-container">
+                <div class="progress-bar"></div>
+            </div>
+            {content}
+        </div>
+    </body>
+    </html>
+    """)
+
+
+@app.route("/templated")
+def templated():
+    return render_template(
+        "chatbot.html", current_step=CURRENT_STEP, step_template="document.html",
+        extracted_data=EXTRACTED_DATA, job_id=None, job_failed=False,
+        show_next_button=False, progress=PROGRESS,
+    )
+
+
+def requests_per_second(client, path, seconds, headers=None):
+    client.get(path, headers=headers)  # Warm up
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        response = client.get(path, headers=headers)
+        count += 1
+    return count / seconds, response
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    client = app.test_client()
+    with app.app_context():
+        for name in app.jinja_env.list_templates(extensions=["html"]):
+            app.jinja_env.get_template(name)  # Same warm-up as app.precompile_templates
+
+    print(f"{'GET':<34}{'req/s':>10}{'bytes':>8}")
+    for label, path in [("legacy render_template_string", "/legacy"), ("precompiled template", "/templated")]:
+        rate, response = requests_per_second(client, path, seconds)
+        print(f"{label:<34}{rate:>10.0f}{len(response.data):>8}")
+
+    # The stylesheet is now a separate, cacheable asset; repeat visits revalidate it with its ETag
+    etag = client.get("/static/chatbot.css").headers["ETag"]
+    rate, response = requests_per_second(client, "/static/chatbot.css", seconds, {"If-None-Match": etag})
+    print(f"{'static/chatbot.css (revalidate)':<34}{rate:>10.0f}{len(response.data):>8}  HTTP {response.status_code}")
+
+
+if __name__ == "__main__":
+    main()
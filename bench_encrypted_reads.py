@@ -0,0 +1,84 @@
+"""Benchmark: reads per second of encrypted processed documents, decrypt-in-place vs decrypt-to-memory.
+
+"in-place" is what extract_text_from_image did before: decrypt the file on
+disk, open it, re-encrypt it (two full rewrites per read). "in-memory"
+decrypts into a buffer and hands it to PIL. Reads stop at the decoded image;
+pass --ocr to include Tesseract as well (needs the tesseract binary).
+
+Run with: python bench_encrypted_reads.py [documents] [--ocr]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from cryptography.fernet import Fernet
+from PIL import Image, ImageDraw
+
+import secure_storage
+
+SECONDS = 3.0
+
+
+def make_documents(folder, count, key):
+    """Writes `count` encrypted PNG scans (A4 at 150 DPI, a few lines of text)."""
+    paths = []
+    for number in range(count):
+        img = Image.new("L", (1240, 1754), 255)
+        draw = ImageDraw.Draw(img)
+        for line in range(12):
+            draw.text((100, 150 + line * 40), f"INCOME TAX DEPARTMENT  Name: APPLICANT {number}  ABCDE{1000 + number}F", fill=0)
+        path = os.path.join(folder, f"document_{number}.png")
+        img.save(path)
+        secure_storage.encrypt_file(path, key)
+        paths.append(path)
+    return paths
+
+
+def read_in_place(path, key, ocr):
+    secure_storage.decrypt_file(path, key)
+    with Image.open(path) as img:
+        img.load()
+        if ocr:
+            ocr(img)
+    secure_storage.encrypt_file(path, key)
+
+
+def read_in_memory(path, key, ocr):
+    with Image.open(secure_storage.open_decrypted(path, key)) as img:
+        img.load()
+        if ocr:
+            ocr(img)
+
+
+def run(read, paths, key, ocr):
+    reads = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < SECONDS:
+        read(paths[reads % len(paths)], key, ocr)
+        reads += 1
+    return reads / (time.perf_counter() - started)
+
+
+def main():
+    count = int(next((arg for arg in sys.argv[1:] if arg.isdigit()), 20))
+    ocr = None
+    if "--ocr" in sys.argv:
+        import pytesseract
+        ocr = pytesseract.image_to_string
+
+    key = Fernet.generate_key()
+    with tempfile.TemporaryDirectory() as folder:
+        paths = make_documents(folder, count, key)
+        size_kb = os.path.getsize(paths[0]) / 1024
+        print(f"{count} encrypted documents of ~{size_kb:.0f} KB{' (with OCR)' if ocr else ''}")
+        print(f"{'path':<12}{'reads/s':>10}")
+        results = {}
+        for name, read in (("in-place", read_in_place), ("in-memory", read_in_memory)):
+            results[name] = run(read, paths, key, ocr)
+            print(f"{name:<12}{results[name]:>10.1f}")
+        print(f"\nSpeedup: {results['in-memory'] / results['in-place']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Micro-benchmark: per-document field extraction latency, legacy regex cascade vs field_extraction.
+
+Run with: python bench_extraction.py [iterations]
+"""
+import re
+import sys
+import timeit
+
+from field_extraction import extract_fields
+
+SAMPLE_TEXTS = {
+    "Aadhaar Card": (
+        "Government of India\nUnique Identification Authority of India\n"
+        "Full Name: John Doe\nDOB: 01/01/1990\nGender: Male\n"
+        "Address: 123, ABC Street, XYZ City, Country\n"
+        "Aadhaar Number: 1234 5678 9012\n" + "Mera Aadhaar, Meri Pehchaan\n" * 20
+    ),
+    "PAN Card": (
+        "INCOME TAX DEPARTMENT\nGOVT. OF INDIA\nPermanent Account Number Card\n"
+        "Name: JOHN DOE\nFather's Name: RICHARD DOE\nDate of Birth: 01/01/1990\n"
+        "ABCDE1234F\nSignature: John Doe\nTax Status: Individual\n" + "Valid throughout India\n" * 20
+    ),
+    "12th Certificate": (
+        "Central Board of Secondary Education\nSenior School Certificate Examination\n"
+        "Name: John Doe\nDOB: 01/01/1990\nSchool: Green Valley Public School\n"
+        + "Subject-wise grades are listed overleaf.\n" * 30
+        + "Year of Completion: 2008\nMarks: 87.4\n"
+    ),
+    "UG Certificate": (
+        "Provisional Degree Certificate\nName: John Doe\nDegree: Bachelor of Technology in Computer Science\n"
+        "University: XYZ Technical University\n" + "Awarded after completion of all prescribed courses.\n" * 30
+        + "Year of Completion: 2012\nCGPA: 8.6/10\n"
+    ),
+    "Course Fee Structure": (
+        "XYZ Institute of Technology\nFee Structure 2025-26\n"
+        + "Tuition, hostel and library charges apply as per the semester schedule.\n" * 40
+        + "Total Fees: 4,50,000\nPayment Due Date: 15 August 2025\n"
+        "Course Duration: 4 Years\nInstallment Amount: 56,250 per semester\n"
+    ),
+    "Income Proof": (
+        "Salary Certificate\n" + "This is to certify the employment details given below.\n" * 30
+        + "Applicant Income: 12,00,000\nEmployer: ABC Private Limited\nSalary: 1,00,000\n"
+        "Co-Applicant Income: 6,00,000\n"
+    ),
+    "Collateral Documents, if required": (
+        "Loan Collateral Declaration\n"
+        + "The applicant hereby pledges the property described below as security.\n" * 40
+        + "Property Details: Plot 42, Sector 7, Green Valley\nMarket Value: 75,00,000\n"
+        "Ownership Proof: Sale deed registered 2015\nLegal Documents: Encumbrance certificate, tax receipts\n"
+        "Mortgage: None\n"
+    ),
+}
+
+
+def legacy_extract_details(text, doc_type):
+    """The per-field re.search cascade extract_details used before field_extraction (debug prints removed)."""
+    extracted_data = dict.fromkeys([
+        "Full Name", "DOB", "Gender", "Address", "Aadhaar Number", "PAN Number", "Signature",
+        "Tax Status", "School Name", "Year of Completion", "Marks", "Degree & Major",
+        "University Name", "CGPA/Marks", "Total Fees", "Payment Deadlines", "Course Duration",
+        "Installment Info", "Applicant Income", "Employer Details", "Salary Slips/Tax Returns",
+        "Co-Applicant Income", "Property Details", "Market Value", "Ownership Proof",
+        "Legal Documents", "Mortgage Details",
+    ], "Not Found")
+
+    name_match = dob_match = gender_match = address_match = aadhaar_match = None
+    pan_match = signature_match = tax_status_match = school_match = year_match = marks_match = None
+    degree_match = university_match = cgpa_match = fee_match = payment_match = None
+    duration_match = installment_match = income_match = employer_match = salary_match = None
+    co_income_match = property_match = market_value_match = ownership_match = None
+    legal_docs_match = mortgage_match = None
+
+    if "Aadhaar" in doc_type:
+        name_match = re.search(r"Full Name[:\s]+([\w\s]+)", text, re.IGNORECASE)
+        dob_match = re.search(r'\b(\d{2}/\d{2}/\d{4})\b', text)
+        gender_match = re.search(r"\b(Male|Female|Other)\b", text, re.IGNORECASE)
+        address_match = re.search(r"Address[:\s]+([\w\s,]+)", text, re.IGNORECASE)
+        aadhaar_match = re.search(r'\b\d{4}\s\d{4}\s\d{4}\b', text)
+    elif "PAN" in doc_type:
+        name_match = re.search(r"Name[:\s]+([\w\s]+)", text, re.IGNORECASE)
+        dob_match = re.search(r'\b(\d{2}/\d{2}/\d{4})\b', text)
+        pan_match = re.search(r'[A-Z]{5}[0-9]{4}[A-Z]', text)
+        signature_match = re.search(r"Signature[:\s]+([\w\s]+)", text, re.IGNORECASE)
+        tax_status_match = re.search(r"Tax Status[:\s]+([\w\s]+)", text, re.IGNORECASE)
+    elif "10th Certificate" in doc_type or "12th Certificate" in doc_type:
+        name_match = re.search(r"Name[:\s]+([\w\s]+)", text, re.IGNORECASE)
+        dob_match = re.search(r'\b(\d{2}/\d{2}/\d{4})\b', text)
+        school_match = re.search(r"School[:\s]+([\w\s]+)", text, re.IGNORECASE)
+        year_match = re.search(r"Year of Completion[:\s]+(\d{4})", text)
+        marks_match = re.search(r"Marks[:\s]+([\d./]+)", text)
+    elif "UG Certificate" in doc_type:
+        name_match = re.search(r"Name[:\s]+([\w\s]+)", text, re.IGNORECASE)
+        degree_match = re.search(r"Degree[:\s]+([\w\s]+)", text, re.IGNORECASE)
+        university_match = re.search(r"University[:\s]+([\w\s]+)", text, re.IGNORECASE)
+        year_match = re.search(r"Year of Completion[:\s]+(\d{4})", text)
+        cgpa_match = re.search(r"CGPA[:\s]+([\d./]+)", text)
+    elif "Course Fee Structure" in doc_type:
+        fee_match = re.search(r"(Total Fees|Fees Payable)[:\s]+([\d,]+)", text, re.IGNORECASE)
+        payment_match = re.search(r"(Payment Due Date|Payment Deadlines)[:\s]+([\w\s,]+)", text, re.IGNORECASE)
+        duration_match = re.search(r"(Course Duration|Program Length)[:\s]+([\w\s]+)", text, re.IGNORECASE)
+        installment_match = re.search(r"(Installment Amount|Installment Info)[:\s]+([\w\s,]+)", text, re.IGNORECASE)
+    elif "Income Proof" in doc_type:
+        income_match = re.search(r"Applicant Income[:\s]+([\d,]+)", text, re.IGNORECASE)
+        employer_match = re.search(r"Employer[:\s]+([\w\s]+)", text, re.IGNORECASE)
+        salary_match = re.search(r"Salary[:\s]+([\d,]+)", text, re.IGNORECASE)
+        co_income_match = re.search(r"Co-Applicant Income[:\s]+([\d,]+)", text, re.IGNORECASE)
+    elif "Collateral" in doc_type:
+        property_match = re.search(r"Property Details[:\s]+([\w\s,]+)", text, re.IGNORECASE)
+        market_value_match = re.search(r"Market Value[:\s]+([\d,]+)", text, re.IGNORECASE)
+        ownership_match = re.search(r"Ownership Proof[:\s]+([\w\s,]+)", text, re.IGNORECASE)
+        legal_docs_match = re.search(r"Legal Documents[:\s]+([\w\s,]+)", text, re.IGNORECASE)
+        mortgage_match = re.search(r"Mortgage[:\s]+([\w\s,]+)", text, re.IGNORECASE)
+
+    extracted_data["Full Name"] = name_match.group(1).strip() if name_match else "Not Found"
+    extracted_data["DOB"] = dob_match.group(1).strip() if dob_match else "Not Found"
+    extracted_data["Gender"] = gender_match.group(1).strip() if gender_match else "Not Found"
+    extracted_data["Address"] = address_match.group(1).strip() if address_match else "Not Found"
+    extracted_data["Aadhaar Number"] = aadhaar_match.group(0).strip() if aadhaar_match else "Not Found"
+    extracted_data["PAN Number"] = pan_match.group(0).strip() if pan_match else "Not Found"
+    extracted_data["Signature"] = signature_match.group(1).strip() if signature_match else "Not Found"
+    extracted_data["Tax Status"] = tax_status_match.group(1).strip() if tax_status_match else "Not Found"
+    extracted_data["School Name"] = school_match.group(1).strip() if school_match else "Not Found"
+    extracted_data["Year of Completion"] = year_match.group(1).strip() if year_match else "Not Found"
+    extracted_data["Marks"] = marks_match.group(1).strip() if marks_match else "Not Found"
+    extracted_data["Degree & Major"] = degree_match.group(1).strip() if degree_match else "Not Found"
+    extracted_data["University Name"] = university_match.group(1).strip() if university_match else "Not Found"
+    extracted_data["CGPA/Marks"] = cgpa_match.group(1).strip() if cgpa_match else "Not Found"
+    extracted_data["Total Fees"] = fee_match.group(2).strip() if fee_match else "Not Found"
+    extracted_data["Payment Deadlines"] = payment_match.group(2).strip() if payment_match else "Not Found"
+    extracted_data["Course Duration"] = duration_match.group(2).strip() if duration_match else "Not Found"
+    extracted_data["Installment Info"] = installment_match.group(2).strip() if installment_match else "Not Found"
+    extracted_data["Applicant Income"] = income_match.group(1).strip() if income_match else "Not Found"
+    extracted_data["Employer Details"] = employer_match.group(1).strip() if employer_match else "Not Found"
+    extracted_data["Salary Slips/Tax Returns"] = salary_match.group(1).strip() if salary_match else "Not Found"
+    extracted_data["Co-Applicant Income"] = co_income_match.group(1).strip() if co_income_match else "Not Found"
+    extracted_data["Property Details"] = property_match.group(1).strip() if property_match else "Not Found"
+    extracted_data["Market Value"] = market_value_match.group(1).strip() if market_value_match else "Not Found"
+    extracted_data["Ownership Proof"] = ownership_match.group(1).strip() if ownership_match else "Not Found"
+    extracted_data["Legal Documents"] = legal_docs_match.group(1).strip() if legal_docs_match else "Not Found"
+    extracted_data["Mortgage Details"] = mortgage_match.group(1).strip() if mortgage_match else "Not Found"
+    return extracted_data
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{'document':<36}{'legacy us/doc':>15}{'compiled us/doc':>17}{'speedup':>10}")
+    for doc_type, text in SAMPLE_TEXTS.items():
+        # Both implementations must agree on every field the new engine produces
+        legacy = legacy_extract_details(text, doc_type)
+        new = extract_fields(text, doc_type)
+        mismatched = [name for name, value in new.items() if legacy[name] != value]
+        if mismatched:
+            raise SystemExit(f"❌ {doc_type}: results differ for {mismatched}")
+
+        legacy_time = min(timeit.repeat(lambda: legacy_extract_details(text, doc_type), number=iterations, repeat=3))
+        new_time = min(timeit.repeat(lambda: extract_fields(text, doc_type), number=iterations, repeat=3))
+        legacy_us = legacy_time / iterations * 1e6
+        new_us = new_time / iterations * 1e6
+        print(f"{doc_type:<36}{legacy_us:>15.2f}{new_us:>17.2f}{legacy_us / new_us:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark: face-matching a 2-minute KYC video against an Aadhaar card photo, vs decoding the whole video.
+
+From a photo of a face, an Aadhaar-sized card with that photo in its photo
+box is drawn on a white scan, and a 720p video is written with the face
+moving around a plain scene. Timed: decoding every frame of the video,
+face_match.verify_video (FACE_MATCH_FRAMES seeks, early exit after
+FACE_MATCH_CONFIRMATIONS matches) and the same without early exit. With a
+second face photo, a video of that face is verified too (expected: no
+match, or a best score below the threshold when the status is
+low_confidence, as it is without the SFace model).
+
+Needs a face detector: YuNet at FACE_DETECTOR_MODEL, or OpenCV 4.x's Haar cascade.
+
+Run with: python bench_face_match.py face.jpg [other_face.jpg] [--seconds S]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+import face_match
+from card_ocr import CARD_SIZE, photo_box_for
+
+FPS = 30
+SIZE = (1280, 720)
+
+
+def draw_card(face, path):
+    """An Aadhaar-sized card with the face in its photo box, on an A4-ish white scan, saved as PNG."""
+    card = np.full((CARD_SIZE[1], CARD_SIZE[0], 3), 235, np.uint8)
+    left, top, right, bottom = photo_box_for("Aadhaar Card")
+    box = (int(left * CARD_SIZE[0]), int(top * CARD_SIZE[1]), int(right * CARD_SIZE[0]), int(bottom * CARD_SIZE[1]))
+    card[box[1]:box[3], box[0]:box[2]] = cv2.resize(face, (box[2] - box[0], box[3] - box[1]))
+    for line, text in enumerate(["Government of India", "RAVI KUMAR", "DOB: 14/08/1998", "4821 7730 1964"]):
+        cv2.putText(card, text, (320, 200 + line * 90), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (20, 20, 20), 2)
+    scan = np.full((1600, 1400, 3), 255, np.uint8)
+    scan[200:200 + CARD_SIZE[1], 150:150 + CARD_SIZE[0]] = card
+    cv2.imwrite(path, scan)
+
+
+def write_video(face, path, seconds, rng):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), FPS, SIZE)
+    head = cv2.resize(face, (360, int(360 * face.shape[0] / face.shape[1])))
+    noise = [rng.normal(0, 3, (SIZE[1], SIZE[0], 3)).astype(np.int16) for _ in range(8)]  # Sensor noise
+    for index in range(int(seconds * FPS)):
+        frame = np.full((SIZE[1], SIZE[0], 3), (90, 110, 130), np.uint8)
+        x = 300 + int(200 * np.sin(index / 90))
+        y = 150 + int(40 * np.cos(index / 70))
+        visible = frame[y:y + head.shape[0], x:x + head.shape[1]]
+        visible[:] = head[:visible.shape[0], :visible.shape[1]]
+        writer.write(np.clip(frame + noise[index % len(noise)], 0, 255).astype(np.uint8))
+    writer.release()
+
+
+def decode_all(path):
+    capture = cv2.VideoCapture(path)
+    while capture.grab():
+        capture.retrieve()
+    capture.release()
+
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def describe(result, status=True):
+    return (f"{result['status'] if status else '':<10} best score {result['best_score']}, "
+            f"{len(result['matched_at'])} matched of "
+            f"{result['frames_checked']} checked ({result['frames_with_face']} with a face)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("face", help="photo of the applicant's face")
+    parser.add_argument("other_face", nargs="?", help="photo of someone else (impostor check)")
+    parser.add_argument("--seconds", type=float, default=120)
+    args = parser.parse_args()
+
+    detector, embedding = face_match.method()
+    if detector is None:
+        raise SystemExit("❌ No face detector: set FACE_DETECTOR_MODEL to YuNet's ONNX file (or use OpenCV 4.x)")
+    rng = np.random.default_rng(3)
+    face = cv2.imread(args.face)
+
+    with tempfile.TemporaryDirectory() as folder:
+        card_path = os.path.join(folder, "aadhaar.png")
+        video_path = os.path.join(folder, "kyc.mp4")
+        draw_card(face, card_path)
+        write_video(face, video_path, args.seconds, rng)
+        print(f"{args.seconds:.0f}s {SIZE[0]}x{SIZE[1]} video at {FPS} fps, {detector}+{embedding}, "
+              f"{face_match.FACE_MATCH_FRAMES} frames, {face_match.FACE_MATCH_CONFIRMATIONS} confirmations")
+
+        _, decode_seconds = timed(decode_all, video_path)
+        print(f"decode whole video:   {decode_seconds * 1000:7.0f} ms")
+        result, seconds = timed(face_match.verify_video, video_path, card_path, "Aadhaar Card")
+        print(f"verify, early exit:   {seconds * 1000:7.0f} ms  ({seconds / decode_seconds:.0%})  {describe(result)}")
+
+        confirmations = face_match.FACE_MATCH_CONFIRMATIONS
+        face_match.FACE_MATCH_CONFIRMATIONS = face_match.FACE_MATCH_FRAMES + 1  # Never satisfied: checks every frame
+        try:
+            full_result, seconds = timed(face_match.verify_video, video_path, card_path, "Aadhaar Card")
+        finally:
+            face_match.FACE_MATCH_CONFIRMATIONS = confirmations
+        print(f"verify, all frames:   {seconds * 1000:7.0f} ms  ({seconds / decode_seconds:.0%})  {describe(full_result, status=False)}")
+
+        if args.other_face:
+            write_video(cv2.imread(args.other_face), video_path, args.seconds, rng)
+            result, seconds = timed(face_match.verify_video, video_path, card_path, "Aadhaar Card")
+            print(f"other person's video: {seconds * 1000:7.0f} ms  ({seconds / decode_seconds:.0%})  {describe(result)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark: time an upload's request thread spends logging, full-text print() vs event_log.
+
+Each simulated upload logs what app.py used to print for a Course Fee
+Structure document: the whole extracted text (a few pages, with an Aadhaar
+and a PAN number in it) and four fee lines. Threads play concurrent
+requests. Everything goes to a pipe drained by a `cat` process, as when the
+server's output is captured by a process manager or container runtime.
+
+Compared: print() as before, event_log at the default INFO level (the debug
+lines are skipped) and at DEBUG with LOG_SAMPLE_RATES sampling (an excerpt
+of 1 in 10 texts is queued, and written by the background thread).
+
+Run with: python bench_logging.py [--uploads N] [--threads N] [--pages N]
+"""
+import argparse
+import io
+import logging
+import statistics
+import subprocess
+import threading
+import time
+
+import event_log
+
+FEE_FIELDS = {"Total Fees": "₹ 2,40,000", "Payment Deadlines": ["15/07/2025", "15/01/2026"],
+              "Course Duration": "4 years", "Installment Info": "2 per year"}
+
+
+def sample_text(pages):
+    page = ("GOVERNMENT OF INDIA  Unique Identification Authority of India\nName: RAVI KUMAR  DOB: 14/08/1998\n"
+            "Aadhaar: 4821 7730 1964   PAN: ABCDE1234F\n" + "Semester fee, hostel, library and exam charges. " * 60)
+    return "\n\f".join(page for _ in range(pages))
+
+
+def print_upload(text, stream):
+    print("\n🔍 Extracted Text from PDF (Before Regex):\n", text, file=stream)
+    print("📌 Detected Document Type:", "Course Fee Structure", file=stream)
+    print("\n🛠 Extracted Course Fee Structure Info:", file=stream)
+    print("Total Fees:", FEE_FIELDS["Total Fees"], file=stream)
+    print("Payment Deadlines:", FEE_FIELDS["Payment Deadlines"], file=stream)
+    print("Course Duration:", FEE_FIELDS["Course Duration"], file=stream)
+    print("Installments:", FEE_FIELDS["Installment Info"], file=stream)
+
+
+log = event_log.get_logger("bench")
+
+
+def log_upload(text, stream):
+    log.debug("🔍 Extracted Text (Before Regex) of %s: %s", "Course Fee Structure", event_log.excerpt(text),
+              extra={"event": "extracted_text"})
+    log.debug("🛠 Extracted Course Fee Structure Info: Total Fees %s, Payment Deadlines %s, Course Duration %s, "
+              "Installments %s", FEE_FIELDS["Total Fees"], FEE_FIELDS["Payment Deadlines"],
+              FEE_FIELDS["Course Duration"], FEE_FIELDS["Installment Info"], extra={"event": "extracted_fields"})
+
+
+def run(upload, text, stream, uploads, threads):
+    """Per-upload time spent in `upload` on the calling thread, in ms, over all threads."""
+    timings = []
+    lock = threading.Lock()
+
+    def worker(count):
+        own = []
+        for _ in range(count):
+            started = time.perf_counter()
+            upload(text, stream)
+            own.append((time.perf_counter() - started) * 1000)
+        with lock:
+            timings.extend(own)
+
+    workers = [threading.Thread(target=worker, args=(uploads // threads,)) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    event_log.flush()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=4000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=3)
+    args = parser.parse_args()
+
+    text = sample_text(args.pages)
+    consumer = subprocess.Popen(["cat"], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+    stream = io.TextIOWrapper(consumer.stdin, encoding="utf-8", line_buffering=True)  # Like unbuffered stdout
+    event_log._handler.target.setStream(stream)
+    print(f"{args.uploads} uploads on {args.threads} threads, {len(text):,} chars of text each")
+
+    variants = [
+        ("print() full text", print_upload, None),
+        ("event_log, INFO", log_upload, logging.INFO),
+        ("event_log, DEBUG sampled", log_upload, logging.DEBUG),
+    ]
+    try:
+        for name, upload, level in variants:
+            if level is not None:
+                logging.getLogger(event_log.ROOT_LOGGER).setLevel(level)
+            timings = sorted(run(upload, text, stream, args.uploads, args.threads))
+            p99 = timings[int(len(timings) * 0.99)]
+            print(f"{name:<26} mean {statistics.mean(timings):7.3f} ms  p99 {p99:7.3f} ms per upload")
+    finally:
+        stream.close()
+        consumer.wait()
+
+
+if __name__ == "__main__":
+    main()
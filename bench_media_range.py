@@ -0,0 +1,141 @@
+"""Benchmark: concurrent HTTP Range reads of a large video under gunicorn, Flask send_file vs media.send_media.
+
+A scratch file is served two ways by the same gunicorn server: Flask's
+send_from_directory (what /static/intro_video.mp4 used before; werkzeug
+slices ranges through a Python wrapper) and media.send_media (sendfile from
+the range's offset). Concurrent clients request random fixed-size ranges,
+like players seeking, for a fixed time per route.
+
+Run with: python bench_media_range.py [--size-mb N] [--range-kb N] [--clients N] [--seconds S] [--workers N]
+"""
+import argparse
+import http.client
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from flask import Flask, send_from_directory
+
+from media import send_media
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+VIDEO_NAME = "bench_video.mp4"
+
+# The app gunicorn serves (serve.py's ProductionServer imports this module by name)
+BENCH_DIR = os.environ.get("MEDIA_BENCH_DIR", tempfile.gettempdir())
+app = Flask(__name__)
+
+
+@app.route("/send_file/<path:filename>")
+def flask_send_file(filename):
+    return send_from_directory(BENCH_DIR, filename, conditional=True)
+
+
+@app.route("/media/<path:filename>")
+def media(filename):
+    return send_media(BENCH_DIR, filename)
+
+
+def serve(port, workers):
+    from serve import ProductionServer
+
+    ProductionServer("bench_media_range", {
+        "bind": f"127.0.0.1:{port}", "workers": workers, "preload_app": True, "accesslog": None,
+    }).run()
+
+
+def wait_until_up(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("HEAD", f"/media/{VIDEO_NAME}")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f"❌ Server on port {port} did not start")
+
+
+def run_clients(port, route, size, range_size, clients, seconds):
+    latencies = []
+    received = [0]
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(number):
+        rng = random.Random(number)
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        while time.perf_counter() < deadline:
+            start = rng.randrange(0, size - range_size)
+            started = time.perf_counter()
+            conn.request("GET", f"/{route}/{VIDEO_NAME}", headers={"Range": f"bytes={start}-{start + range_size - 1}"})
+            response = conn.getresponse()
+            body = response.read()
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status != 206 or len(body) != range_size:
+                    errors.append(response.status)
+                latencies.append(elapsed)
+                received[0] += len(body)
+
+    threads = [threading.Thread(target=client, args=(number,)) for number in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return len(latencies) / elapsed, received[0] / elapsed / 2 ** 20, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--range-kb", type=int, default=1024)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.workers)
+        return
+
+    size, range_size = args.size_mb * 2 ** 20, args.range_kb * 1024
+    port = 5950
+    with tempfile.TemporaryDirectory() as folder:
+        with open(os.path.join(folder, VIDEO_NAME), "wb") as video:
+            for _ in range(args.size_mb):
+                video.write(os.urandom(2 ** 20))
+
+        env = dict(os.environ, PYTHONPATH=HERE, MEDIA_BENCH_DIR=folder)
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", str(port),
+                                   "--workers", str(args.workers)], env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_up(port)
+            print(f"{args.clients} clients, {args.seconds:.0f}s per route, {args.size_mb} MB file, "
+                  f"{args.range_kb} KB ranges, {args.workers} gunicorn workers")
+            print(f"{'route':<12}{'req/s':>8}{'MB/s':>9}{'p50 ms':>9}{'p95 ms':>9}  errors")
+            for route in ("send_file", "media"):
+                throughput, mb_per_second, latencies, errors = run_clients(
+                    port, route, size, range_size, args.clients, args.seconds)
+                latencies.sort()
+                p50 = statistics.median(latencies) * 1000
+                p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+                print(f"{route:<12}{throughput:>8.1f}{mb_per_second:>9.1f}{p50:>9.1f}{p95:>9.1f}  {len(errors)}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
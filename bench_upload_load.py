@@ -0,0 +1,130 @@
+"""Load test: throughput and latency of ocr_api.py's /upload, Flask dev server vs serve.py (gunicorn).
+
+Each server runs in a scratch directory; concurrent clients post the same
+sample image for a fixed time. Without a tesseract binary every request
+fails at the OCR step (HTTP 500), so check the status counts before
+comparing numbers.
+
+Run with: python bench_upload_load.py [image] [--clients N] [--seconds S] [--workers N]
+"""
+import argparse
+import http.client
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def sample_image():
+    """A4 page at 150 DPI with a few lines of ID-card text, as PNG bytes."""
+    from PIL import Image, ImageDraw
+
+    img = Image.new("L", (1240, 1754), 255)
+    draw = ImageDraw.Draw(img)
+    for line, text in enumerate(["INCOME TAX DEPARTMENT", "Name: JOHN DOE", "DOB: 01/01/1990", "ABCDE1234F"]):
+        draw.text((100, 150 + line * 60), text, fill=0)
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def multipart(image, filename):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"document\"; filename=\"{filename}\"\r\n"
+        "Content-Type: image/png\r\n\r\n"
+    ).encode() + image + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def wait_until_up(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f"❌ Server on port {port} did not start")
+
+
+def run_clients(port, image, clients, seconds):
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(number):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        sent = 0
+        while time.perf_counter() < deadline:
+            body, content_type = multipart(image, f"load_{number}_{sent}.png")
+            started = time.perf_counter()
+            conn.request("POST", "/upload", body=body, headers={"Content-Type": content_type})
+            response = conn.getresponse()
+            response.read()
+            elapsed = time.perf_counter() - started
+            sent += 1
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+
+    threads = [threading.Thread(target=client, args=(number,)) for number in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies) / (time.perf_counter() - started), latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("image", nargs="?", help="image to upload (default: a generated sample)")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if args.image:
+        with open(args.image, "rb") as image_file:
+            image = image_file.read()
+    else:
+        image = sample_image()
+
+    servers = {
+        "dev": [sys.executable, "-c", "import sys, ocr_api; ocr_api.app.run(port=int(sys.argv[1]))", "{port}"],
+        "gunicorn": [sys.executable, os.path.join(HERE, "serve.py"), "ocr_api",
+                     "--bind", "127.0.0.1:{port}", "--workers", str(args.workers)],
+    }
+    env = dict(os.environ, PYTHONPATH=HERE)
+    print(f"{args.clients} clients, {args.seconds:.0f}s, {len(image) // 1024} KB image, {args.workers} gunicorn workers")
+    print(f"{'server':<10}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}  statuses")
+    for offset, (name, command) in enumerate(servers.items()):
+        port = 5900 + offset
+        with tempfile.TemporaryDirectory() as cwd:
+            server = subprocess.Popen([part.format(port=port) for part in command], cwd=cwd, env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_until_up(port)
+                throughput, latencies, statuses = run_clients(port, image, args.clients, args.seconds)
+            finally:
+                server.terminate()
+                server.wait()
+        latencies.sort()
+        p50 = statistics.median(latencies) * 1000
+        p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+        print(f"{name:<10}{throughput:>8.1f}{p50:>9.1f}{p95:>9.1f}  {statuses}")
+
+
+if __name__ == "__main__":
+    main()
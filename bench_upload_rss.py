@@ -0,0 +1,111 @@
+"""Benchmark: server peak RSS and time while uploading a large video, Werkzeug default vs streaming uploads.
+
+Each mode runs a fresh server process; the client streams a synthetic
+multipart body (default 500 MB) so the client itself stays small.
+
+Run with: python bench_upload_rss.py [size_mb]
+"""
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from flask import Flask, request
+from werkzeug.serving import make_server
+
+from uploads import StreamingUploadRequest, save_upload, MULTIPART_OVERHEAD
+
+BOUNDARY = "----bench-upload-boundary"
+CHUNK = b"\0" * (1024 * 1024)
+
+
+def peak_rss_kb():
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return 0
+
+
+def serve(mode, port, folder):
+    """Server process: accepts one kind of upload (mode 'default' or 'streaming')."""
+    app = Flask(__name__)
+    if mode == "streaming":
+        app.request_class = StreamingUploadRequest
+
+    @app.route("/upload", methods=["POST"])
+    def upload():
+        if mode == "streaming":
+            request.limit_uploads(folder, 2 * 1024 ** 3)
+        video = request.files["video"]
+        destination = os.path.join(folder, f"{mode}.mp4")
+        if mode == "streaming":
+            save_upload(video, destination)
+        else:
+            video.save(destination)  # What app.py did before
+        os.remove(destination)
+        return "ok"
+
+    @app.route("/rss")
+    def rss():
+        return str(peak_rss_kb())
+
+    make_server("127.0.0.1", port, app).serve_forever()
+
+
+def upload(port, size_mb):
+    head = (
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"video\"; filename=\"kyc.mp4\"\r\n"
+        "Content-Type: video/mp4\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{BOUNDARY}--\r\n".encode()
+
+    def body():
+        yield head
+        for _ in range(size_mb):
+            yield CHUNK
+        yield tail
+
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+    conn.request("POST", "/upload", body=body(), headers={
+        "Content-Type": f"multipart/form-data; boundary={BOUNDARY}",
+        "Content-Length": str(len(head) + size_mb * len(CHUNK) + len(tail)),
+    })
+    response = conn.getresponse()
+    response.read()
+    if response.status != 200:
+        raise SystemExit(f"❌ Upload failed with HTTP {response.status}")
+
+
+def fetch_rss(port):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.request("GET", "/rss")
+    return int(conn.getresponse().read())
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print(f"Uploading {size_mb} MB (+{MULTIPART_OVERHEAD // 1024} KB allowance for multipart framing)")
+    print(f"{'mode':<12}{'peak RSS MB':>14}{'seconds':>10}")
+    for offset, mode in enumerate(["default", "streaming"]):
+        port = 5800 + offset
+        with tempfile.TemporaryDirectory() as folder:
+            server = subprocess.Popen([sys.executable, __file__, "--serve", mode, str(port), folder])
+            try:
+                time.sleep(1.5)  # Let the server start
+                started = time.perf_counter()
+                upload(port, size_mb)
+                elapsed = time.perf_counter() - started
+                print(f"{mode:<12}{fetch_rss(port) / 1024:>14.1f}{elapsed:>10.2f}")
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        serve(sys.argv[2], int(sys.argv[3]), sys.argv[4])
+    else:
+        main()
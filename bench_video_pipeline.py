@@ -0,0 +1,81 @@
+"""Benchmark: sampling frames from an uploaded video, decoding every frame vs seeking, and the full pipeline.
+
+The video is synthetic (moving shapes and a frame counter, 720p, written by
+OpenCV's MPEG-4 encoder). "decode all" reads every frame and keeps one per
+KEYFRAME_INTERVAL; "seek" is video_pipeline.iter_keyframes. The sampled
+frames of both are compared to check the seeks land on the right frames.
+
+Run with: python bench_video_pipeline.py [seconds_of_video]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+import video_pipeline
+
+FPS = 30
+SIZE = (1280, 720)
+
+
+def write_video(path, seconds):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), FPS, SIZE)
+    for index in range(int(seconds * FPS)):
+        frame = np.full((SIZE[1], SIZE[0], 3), 140, np.uint8)
+        cv2.circle(frame, (100 + index % (SIZE[0] - 200), SIZE[1] // 2), 80, (0, 0, 255), -1)
+        cv2.putText(frame, f"frame {index}", (80, 120), cv2.FONT_HERSHEY_SIMPLEX, 3, (255, 255, 255), 6)
+        writer.write(frame)
+    writer.release()
+
+
+def decode_all(path, times):
+    wanted = {round(seconds * FPS): seconds for seconds in times}
+    capture = cv2.VideoCapture(path)
+    frames = {}
+    index = 0
+    while capture.grab():
+        if index in wanted:
+            frames[wanted[index]] = capture.retrieve()[1]
+        index += 1
+    capture.release()
+    return frames
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 60
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "kyc.mp4")
+        write_video(path, seconds)
+        times = video_pipeline.sample_times(seconds)
+        print(f"{seconds:.0f}s {SIZE[0]}x{SIZE[1]} video at {FPS} fps, {len(times)} samples "
+              f"every {video_pipeline.KEYFRAME_INTERVAL:g}s")
+
+        started = time.perf_counter()
+        expected = decode_all(path, times)
+        decode_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        sampled = dict(video_pipeline.iter_keyframes(path, times))
+        seek_seconds = time.perf_counter() - started
+        mismatches = sum(
+            seconds not in sampled or np.abs(sampled[seconds].astype(np.int16) - frame).mean() > 2
+            for seconds, frame in expected.items()
+        )
+        print(f"decode all: {decode_seconds * 1000:7.0f} ms")
+        print(f"seek:       {seek_seconds * 1000:7.0f} ms  ({decode_seconds / seek_seconds:.1f}x, "
+              f"{mismatches} frame(s) differ)")
+
+        started = time.perf_counter()
+        result = video_pipeline.process_video(path, os.path.join(folder, "renditions"))
+        pipeline_seconds = time.perf_counter() - started
+        preview_bytes = os.path.getsize(result["preview"])
+        print(f"\nfull pipeline (probe via {result['probe']['probed_with']}, keyframes, poster, "
+              f"{os.path.basename(result['preview'])}): {pipeline_seconds:.1f}s")
+        print(f"original {os.path.getsize(path) / 2 ** 20:.1f} MB -> preview {preview_bytes / 2 ** 20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
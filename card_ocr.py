@@ -0,0 +1,213 @@
+import re
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+import metrics
+from field_extraction import NOT_FOUND, field_names
+from image_preprocessing import binarize
+
+# Cards are warped to the ID-1 format (85.6 x 54 mm) at 300 DPI before the regions are cut out
+CARD_DPI = 300
+CARD_SIZE = (1011, 638)  # width, height in pixels
+CARD_ASPECT_RANGE = (1.3, 1.9)  # An image this shape is taken to be a card cropped to its edges
+BACKGROUND_TOLERANCE = 8  # Grey levels a card may differ from a plain background and still be told apart
+MIN_CARD_AREA = 0.03  # A detected card must cover at least this share of the photo/scan (A4 scan: ~7%)
+
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+DIGITS = "0123456789"
+
+# box: (left, top, right, bottom) as fractions of the card; whitelist: characters Tesseract may return;
+# pattern: what the value must look like in the region's text (group 0 is the value unless it has a group)
+Region = namedtuple("Region", ["field", "box", "whitelist", "pattern"])
+
+# Templates for the current card designs (front side). Adjust the boxes if other layouts need support.
+# The first region of each card is its number: when it can't be read the card isn't accepted.
+CARD_TEMPLATES = [
+    (("Aadhaar",), [
+        Region("Aadhaar Number", (0.20, 0.74, 0.85, 0.90), DIGITS, r"\d{4}\s?\d{4}\s?\d{4}"),
+        Region("Full Name", (0.30, 0.26, 0.97, 0.38), LETTERS, r"[A-Za-z][A-Za-z ]+[A-Za-z]"),
+        Region("DOB", (0.30, 0.38, 0.97, 0.49), DIGITS + "/", r"\d{2}/\d{2}/\d{4}"),
+        Region("Gender", (0.30, 0.49, 0.97, 0.60), LETTERS, r"(?i)\b(male|female|other)\b"),
+    ]),
+    (("PAN",), [
+        Region("PAN Number", (0.03, 0.28, 0.60, 0.42), DIGITS + LETTERS[:26], r"[A-Z]{5}[0-9]{4}[A-Z]"),
+        Region("Full Name", (0.03, 0.46, 0.75, 0.58), LETTERS, r"[A-Za-z][A-Za-z ]+[A-Za-z]"),
+        Region("DOB", (0.03, 0.78, 0.60, 0.92), DIGITS + "/", r"\d{2}/\d{2}/\d{4}"),
+    ]),
+]
+
+REGION_GAP = 40  # White rows between regions stacked into one Tesseract call
+
+# Where the holder's photo is on each card (left, top, right, bottom as fractions of the card), for face matching
+PHOTO_BOXES = [
+    (("Aadhaar",), (0.03, 0.24, 0.29, 0.80)),
+    (("PAN",), (0.74, 0.22, 0.97, 0.76)),
+]
+
+
+def template_for(doc_type):
+    for keywords, regions in CARD_TEMPLATES:
+        if doc_type and any(keyword in doc_type for keyword in keywords):
+            return regions
+    return None
+
+
+def photo_box_for(doc_type):
+    for keywords, box in PHOTO_BOXES:
+        if doc_type and any(keyword in doc_type for keyword in keywords):
+            return box
+    return None
+
+
+def _order_corners(points):
+    """Orders four (x, y) points as top-left, top-right, bottom-right, bottom-left, long side horizontal."""
+    sums = points.sum(axis=1)
+    diffs = np.diff(points, axis=1).ravel()
+    corners = np.array([points[np.argmin(sums)], points[np.argmin(diffs)],
+                        points[np.argmax(sums)], points[np.argmax(diffs)]], dtype=np.float32)
+    if np.linalg.norm(corners[1] - corners[0]) < np.linalg.norm(corners[3] - corners[0]):
+        corners = np.roll(corners, -1, axis=0)  # Card photographed in portrait orientation (upside down isn't detected)
+    return corners
+
+
+def _card_masks(small):
+    """Binary images whose outer contours may outline the card: edges (photos) and a global threshold (scans)."""
+    blurred = cv2.GaussianBlur(small, (5, 5), 0)
+    yield cv2.dilate(cv2.Canny(blurred, 50, 150), np.ones((3, 3), np.uint8))
+    # A light card on a white scanner bed has weak edges but still differs from the background,
+    # which is taken to be what the image border shows
+    border = np.concatenate([blurred[0], blurred[-1], blurred[:, 0], blurred[:, -1]])
+    mask = (np.abs(blurred.astype(np.int16) - int(np.median(border))) > BACKGROUND_TOLERANCE).astype(np.uint8) * 255
+    yield cv2.morphologyEx(mask, cv2.MORPH_CLOSE, np.ones((9, 9), np.uint8))
+
+
+def _find_card_corners(small):
+    min_area = MIN_CARD_AREA * small.shape[0] * small.shape[1]
+    for mask in _card_masks(small):
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+            area = cv2.contourArea(contour)
+            if area < min_area:
+                break
+            rect = cv2.minAreaRect(contour)
+            width, height = rect[1]
+            if not width or not height or area < 0.85 * width * height:
+                continue  # Not rectangular
+            if not CARD_ASPECT_RANGE[0] <= max(width, height) / min(width, height) <= CARD_ASPECT_RANGE[1]:
+                continue
+            approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+            points = approx.reshape(4, 2) if len(approx) == 4 else cv2.boxPoints(rect)
+            return _order_corners(points.astype(np.float32))
+    return None
+
+
+def locate_card(gray):
+    """Finds the card in a photo or scan and returns it warped flat to CARD_SIZE, or None if there's no card."""
+    height, width = gray.shape
+    scale = min(800 / max(height, width), 1.0)  # Contours are found on a small copy
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else gray
+
+    corners = _find_card_corners(small)
+    if corners is not None:
+        target = np.array([[0, 0], [CARD_SIZE[0], 0], [CARD_SIZE[0], CARD_SIZE[1]], [0, CARD_SIZE[1]]], dtype=np.float32)
+        matrix = cv2.getPerspectiveTransform(corners / scale, target)
+        return cv2.warpPerspective(gray, matrix, CARD_SIZE, flags=cv2.INTER_LINEAR)
+
+    # No card outline: accept the image itself if it is already cropped to a card
+    if CARD_ASPECT_RANGE[0] <= width / height <= CARD_ASPECT_RANGE[1]:
+        return cv2.resize(gray, CARD_SIZE, interpolation=cv2.INTER_AREA if width > CARD_SIZE[0] else cv2.INTER_CUBIC)
+    return None
+
+
+def _ocr_regions(card, regions):
+    """OCRs regions sharing a whitelist in one Tesseract call; returns their text in the same order.
+
+    The regions are stacked into one strip with white gaps and every recognised
+    word is assigned back to a region by its vertical position.
+    """
+    import ocr_engine
+
+    crops = []
+    for region in regions:
+        left, top, right, bottom = region.box
+        crop = card[int(top * CARD_SIZE[1]):int(bottom * CARD_SIZE[1]), int(left * CARD_SIZE[0]):int(right * CARD_SIZE[0])]
+        crops.append(binarize(crop, CARD_DPI))
+    strip_width = max(crop.shape[1] for crop in crops)
+    rows, starts, top = [], [], 0
+    for crop in crops:
+        starts.append(top)
+        rows.append(np.pad(crop, ((0, REGION_GAP), (0, strip_width - crop.shape[1])), constant_values=255))
+        top += crop.shape[0] + REGION_GAP
+    strip = np.vstack(rows)
+
+    config = f"--oem 1 --psm 6 -c tessedit_char_whitelist={regions[0].whitelist}"
+    tesseract = ocr_engine.get_tesseract()
+    data = tesseract.image_to_data(strip, config=config, output_type=tesseract.Output.DICT)
+
+    words = [[] for _ in regions]
+    for text, word_top, word_height in zip(data["text"], data["top"], data["height"]):
+        if text.strip():
+            index = max(int(np.searchsorted(starts, word_top + word_height / 2, side="right")) - 1, 0)
+            words[index].append(text.strip())
+    return [" ".join(region_words) for region_words in words]
+
+
+def read_card(gray, doc_type):
+    """Reads an Aadhaar or PAN card from its name/DOB/number regions only.
+
+    Returns {field: value} with the same field names as extract_details (fields
+    without a region are "Not Found", callers fill them in from full-page OCR
+    with merge_fields), or None when the doc type has no template, no card is
+    found or its number can't be read; callers then use full-page OCR alone.
+    """
+    regions = template_for(doc_type)
+    if regions is None:
+        return None
+    card = locate_card(gray)
+    if card is None:
+        return None
+
+    # One Tesseract run per whitelist instead of one per region (each run is a new process)
+    texts = {}
+    groups = {}
+    for region in regions:
+        groups.setdefault(region.whitelist, []).append(region)
+    for group in groups.values():
+        with metrics.timer("tesseract", doc_type):
+            texts.update(zip((region.field for region in group), _ocr_regions(card, group)))
+
+    values = {}
+    for region in regions:
+        match = re.search(region.pattern, texts[region.field])
+        if match:
+            values[region.field] = (match.group(1) if match.groups() else match.group(0)).strip()
+    number = regions[0].field
+    if number not in values:
+        return None
+
+    if "Aadhaar Number" in values:
+        digits = re.sub(r"\D", "", values["Aadhaar Number"])
+        values["Aadhaar Number"] = f"{digits[:4]} {digits[4:8]} {digits[8:]}"  # Same format the regex extractor gives
+    if "Gender" in values:
+        values["Gender"] = values["Gender"].capitalize()
+    return {name: values.get(name, NOT_FOUND) for name in field_names(doc_type)}
+
+
+def merge_fields(card_fields, text_fields):
+    """Card region values, with the ones they miss (no region, or unreadable) taken from full-page OCR fields."""
+    return {name: text_fields.get(name, NOT_FOUND) if value == NOT_FOUND else value
+            for name, value in card_fields.items()}
+
+
+def card_photo(gray, doc_type):
+    """The photo region of an Aadhaar/PAN card in a scan or photo, or None if the card or its layout isn't known."""
+    box = photo_box_for(doc_type)
+    if box is None:
+        return None
+    card = locate_card(gray)
+    if card is None:
+        return None
+    left, top, right, bottom = box
+    return card[int(top * CARD_SIZE[1]):int(bottom * CARD_SIZE[1]), int(left * CARD_SIZE[0]):int(right * CARD_SIZE[0])]
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import multiprocessing.util
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import sqlite_db
+from field_extraction import EXTRACTOR_VERSION
+
+# --- CACHE SETTINGS (override with environment variables) ---
+CACHE_DB = os.environ.get("DOC_CACHE_DB", "doc_cache.sqlite3")
+CACHE_MEMORY_BYTES = int(os.environ.get("DOC_CACHE_MEMORY_BYTES", 32 * 1024 * 1024))
+# Hit/miss counts are added to the database at most this often per process (and when it exits)
+CACHE_COUNTER_FLUSH_SECONDS = float(os.environ.get("DOC_CACHE_COUNTER_FLUSH_SECONDS", 10))
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(file_path):
+    """SHA-256 of a file's contents, read in chunks so large uploads aren't loaded into memory."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """In-memory LRU cache bounded by the total size of its (string) values."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+
+    def get(self, key):
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        if key in self._items:
+            self.size -= len(self._items.pop(key))
+        if len(value) > self.max_bytes:  # Too big to keep in memory, disk only
+            return
+        self._items[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SQLiteStore:
+    """On-disk key/value store backed by a single SQLite table."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _connection(self):
+        return sqlite_db.connect(self.path, [
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)",
+            "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, count INTEGER NOT NULL)",
+        ])
+
+    def get(self, key):
+        row = self._connection().execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value):
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created) VALUES (?, ?, ?)", (key, value, time.time())
+            )
+
+    def add_counts(self, counts):
+        """Adds {name: n} to the stored counters in one transaction."""
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO counters (name, count) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET count = count + excluded.count",
+                counts.items(),
+            )
+
+    def counters(self):
+        return dict(self._connection().execute("SELECT name, count FROM counters").fetchall())
+
+
+class DocumentCache:
+    """Content-addressed cache of extracted text and extracted fields.
+
+    Text is keyed by the file's SHA-256 and the OCR resolution and profile, fields by the
+    same plus the doc type and EXTRACTOR_VERSION (OCR setting changes must not serve
+    fields read under the old ones), so a re-uploaded file skips
+    PyMuPDF/Tesseract and extraction entirely.
+
+    Documents are processed in the job worker processes, so the hit/miss
+    counters are summed in the SQLite database: each process counts in memory
+    and adds its counts every CACHE_COUNTER_FLUSH_SECONDS and when it exits.
+    The lock only guards the in-memory LRU and counts, never a disk access.
+    """
+
+    def __init__(self, db_path=CACHE_DB, memory_bytes=CACHE_MEMORY_BYTES):
+        self.memory = LRUCache(memory_bytes)
+        self.disk = SQLiteStore(db_path)
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._pid = None
+        self._next_flush = 0.0
+
+    def _count(self, name):
+        # Under self._lock. A forked worker starts from zero (its parent adds its own counts) and flushes at exit
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._counts = Counter()
+            self._next_flush = time.monotonic() + CACHE_COUNTER_FLUSH_SECONDS
+            multiprocessing.util.Finalize(self, self.flush_counters, exitpriority=10)
+        self._counts[name] += 1
+
+    def flush_counters(self):
+        """Adds this process's hit/miss counts since the last flush to the database."""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._next_flush = time.monotonic() + CACHE_COUNTER_FLUSH_SECONDS
+        if counts and self._pid == os.getpid():
+            self.disk.add_counts(counts)
+
+    def _get(self, key):
+        with self._lock:
+            value = self.memory.get(key)
+            if value is not None:
+                self._count("memory_hits")
+        if value is None:
+            value = self.disk.get(key)
+            with self._lock:
+                if value is not None:
+                    self._count("disk_hits")
+                    self.memory.set(key, value)
+                else:
+                    self._count("misses")
+        if time.monotonic() >= self._next_flush:
+            self.flush_counters()
+        return value
+
+    def _set(self, key, value):
+        self.disk.set(key, value)
+        with self._lock:
+            self.memory.set(key, value)
+
+    @staticmethod
+    def text_key(digest, dpi, profile=None):
+        # profile: OCR settings besides the DPI (preprocessing, Tesseract config), see ocr_engine.ocr_profile
+        return f"text:{digest}:{dpi}" + (f":{profile}" if profile else "")
+
+    @staticmethod
+    def fields_key(digest, doc_type, dpi=None, profile=None):
+        # profile: OCR settings besides the DPI, including the card ROI mode, see ocr_engine.fields_profile
+        return f"fields:{digest}:{doc_type}:{EXTRACTOR_VERSION}:{dpi}" + (f":{profile}" if profile else "")
+
+    def get_text(self, digest, dpi, profile=None):
+        return self._get(self.text_key(digest, dpi, profile))
+
+    def set_text(self, digest, dpi, text, profile=None):
+        self._set(self.text_key(digest, dpi, profile), text)
+
+    def get_fields(self, digest, doc_type, dpi=None, profile=None):
+        value = self._get(self.fields_key(digest, doc_type, dpi, profile))
+        return json.loads(value) if value is not None else None
+
+    def set_fields(self, digest, doc_type, fields, dpi=None, profile=None):
+        self._set(self.fields_key(digest, doc_type, dpi, profile), json.dumps(fields, separators=(",", ":")))
+
+    def stats(self):
+        """Hit/miss counters of all processes (others' up to a flush interval behind), plus this process's memory use."""
+        self.flush_counters()
+        counters = dict({"memory_hits": 0, "disk_hits": 0, "misses": 0}, **self.disk.counters())
+        lookups = sum(counters.values())
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        with self._lock:
+            return dict(
+                counters,
+                hit_rate=round(hits / lookups, 3) if lookups else 0.0,
+                memory_entries=len(self.memory),
+                memory_bytes=self.memory.size,
+            )
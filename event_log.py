@@ -0,0 +1,160 @@
+import atexit
+import logging
+import logging.handlers
+import multiprocessing.util
+import os
+import queue
+import random
+import re
+import sys
+
+# Log records are put on an in-memory queue by the request/worker thread and written out by a
+# background thread, so a slow console or disk never holds up an upload.
+
+# --- LOGGING SETTINGS (override with environment variables) ---
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()  # DEBUG also logs (sampled) extracted text and fields
+LOG_FILE = os.environ.get("LOG_FILE")  # Appended to by every process; stderr when unset
+LOG_EXCERPT_CHARS = int(os.environ.get("LOG_EXCERPT_CHARS", 200))  # Extracted text is cut to this in log lines
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))  # Records beyond this are dropped, never waited for
+# Fraction of records kept per event, e.g. "extracted_text=0.05,extracted_fields=0.2" (unlisted events: all)
+LOG_SAMPLE_RATES = os.environ.get("LOG_SAMPLE_RATES", "extracted_text=0.1,extracted_fields=0.1")
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s"
+ROOT_LOGGER = "bank"
+
+# Aadhaar numbers keep their last 4 digits (as on UIDAI's masked Aadhaar), PAN numbers their last 4 characters.
+# No word boundaries and any whitespace between the digit groups: OCR often glues numbers to the text around
+# them, splits them over lines and gets the case of PANs wrong, and masking too much is harmless.
+AADHAAR_PATTERN = re.compile(r"(?<!\d)\d{4}([\s-]*)\d{4}([\s-]*)(\d{4})(?!\d)")
+PAN_PATTERN = re.compile(r"[A-Z]{5}\d([0-9]{3}[A-Z])", re.IGNORECASE)
+# The rest of a number cut in two by an excerpt: up to 11 more digits/letters (and the one after, for the
+# lookahead), separated by whitespace or hyphens
+PII_TAIL_PATTERN = re.compile(r"(?:[\s-]*[0-9A-Za-z]){0,12}")
+
+
+def _parse_sample_rates(value):
+    rates = {}
+    for item in value.split(","):
+        event, _, rate = item.partition("=")
+        if event.strip() and rate.strip():
+            rates[event.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+SAMPLE_RATES = _parse_sample_rates(LOG_SAMPLE_RATES)
+
+
+def redact(text):
+    """Masks Aadhaar and PAN numbers in text."""
+    text = AADHAAR_PATTERN.sub(lambda match: f"XXXX{match.group(1)}XXXX{match.group(2)}{match.group(3)}", text)
+    return PAN_PATTERN.sub(lambda match: f"XXXXXX{match.group(1)}", text)
+
+
+def excerpt(text, limit=None):
+    """The start of a (long) text for a log line, redacted, with the number of characters left out.
+
+    Redacted before it is cut (a number cut in half would no longer be
+    recognised later), over just enough of the text to cover a number
+    straddling the cut. Masking keeps the length of the text.
+    """
+    limit = LOG_EXCERPT_CHARS if limit is None else limit
+    text = text or ""
+    if len(text) <= limit:
+        return redact(text)
+    window = PII_TAIL_PATTERN.match(text, limit).end()
+    return f"{redact(text[:window])[:limit]}… (+{len(text) - limit} chars)"
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps SAMPLE_RATES[event] of the records logged with extra={"event": ...}; warnings and errors are always kept."""
+
+    def filter(self, record):
+        rate = SAMPLE_RATES.get(getattr(record, "event", None), 1.0)
+        return rate >= 1.0 or record.levelno >= logging.WARNING or random.random() < rate
+
+
+class RedactingFormatter(logging.Formatter):
+    """Formats records (tracebacks included) with Aadhaar/PAN numbers masked; runs on the writer thread."""
+
+    def format(self, record):
+        return redact(super().format(record))
+
+
+class AsyncHandler(logging.handlers.QueueHandler):
+    """Queues records for a writer thread, started on first use in each process.
+
+    A thread doesn't survive a fork, so a gunicorn/job/OCR worker process gets
+    its own queue and writer the first time it logs. A full queue drops the
+    record (counted in `dropped`) instead of blocking the caller.
+    """
+
+    def __init__(self, target):
+        super().__init__(queue.Queue(LOG_QUEUE_SIZE))
+        self.target = target
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+
+    def _start(self):
+        # Runs under the handler lock (Handler.handle holds it around emit); the queue inherited
+        # from the parent process is abandoned along with its dead writer thread
+        self.queue = queue.Queue(LOG_QUEUE_SIZE)
+        self.dropped = 0
+        self._listener = logging.handlers.QueueListener(self.queue, self.target)
+        self._listener.start()
+        self._pid = os.getpid()
+        # Pool worker processes end with os._exit, skipping atexit; multiprocessing's finalizers still run
+        multiprocessing.util.Finalize(self, self.close, exitpriority=10)
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Waits until this process's queued records have been written."""
+        if self._pid == os.getpid():
+            self.queue.join()
+            self.target.flush()
+
+    def close(self):
+        if self._pid == os.getpid() and self._listener is not None:
+            self._listener.stop()  # Writes out what's still queued
+            self._pid = None
+        super().close()
+
+
+def _output_handler():
+    if LOG_FILE:
+        handler = logging.handlers.WatchedFileHandler(LOG_FILE, encoding="utf-8")  # Follows logrotate
+    else:
+        handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(RedactingFormatter(LOG_FORMAT))
+    return handler
+
+
+def _configure():
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False  # Flask's/gunicorn's own logging is left as it is
+    handler = AsyncHandler(_output_handler())
+    handler.addFilter(SamplingFilter())  # Sampled out before queueing, so dropped records cost nothing more
+    logger.addHandler(handler)
+    atexit.register(handler.close)
+    return handler
+
+
+_handler = _configure()
+
+
+def get_logger(name):
+    """The logger for one module (e.g. get_logger("app")), writing through the shared queue."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def flush():
+    """Waits until everything logged so far is written (e.g. before an interactive prompt)."""
+    _handler.flush()
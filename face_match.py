@@ -0,0 +1,229 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+
+# --- FACE MATCH SETTINGS (override with environment variables) ---
+# OpenCV Zoo models: YuNet (face_detection_yunet_2023mar.onnx) and SFace (face_recognition_sface_2021dec.onnx)
+FACE_DETECTOR_MODEL = os.environ.get("FACE_DETECTOR_MODEL", "models/face_detection_yunet_2023mar.onnx")
+FACE_RECOGNIZER_MODEL = os.environ.get("FACE_RECOGNIZER_MODEL", "models/face_recognition_sface_2021dec.onnx")
+FACE_MATCH_FRAMES = int(os.environ.get("FACE_MATCH_FRAMES", 12))  # Frames sampled across the video at most
+FACE_MATCH_CONFIRMATIONS = int(os.environ.get("FACE_MATCH_CONFIRMATIONS", 2))  # Matching frames needed, then stop
+FACE_MATCH_THRESHOLD = os.environ.get("FACE_MATCH_THRESHOLD")  # Overrides the per-method threshold below
+
+# Cosine similarity at or above which two faces count as the same person, per embedding method
+# (SFace: OpenCV's recommended threshold; LBP: histograms of face texture, a much weaker fallback whose
+# threshold sits between same-face (0.84-0.91) and other-face (up to 0.77) scores on augmented sample faces).
+# Only SFace can decide a match: LBP results are reported as low_confidence for a manual review.
+MATCH_THRESHOLDS = {"sface": 0.363, "lbp": 0.80}
+
+DETECT_MAX_SIDE = 640  # Frames are shrunk to this before detection, faces in a KYC video are large
+DETECT_SCORE = 0.8
+MIN_FACE_SIZE = 40  # Pixels (at detection size)
+LBP_FACE_SIZE = 96
+LBP_GRID = 6
+
+MATCH, NO_MATCH, LOW_CONFIDENCE = "match", "no_match", "low_confidence"
+NO_REFERENCE_FACE, NO_VIDEO_FACE, UNAVAILABLE = "no_reference_face", "no_face_in_video", "unavailable"
+
+_models = {}
+_models_pid = None
+_models_lock = threading.Lock()
+
+
+def _model(name):
+    """Detector/recognizer objects, loaded once per process (not shared across a fork)."""
+    global _models_pid
+    with _models_lock:
+        if _models_pid != os.getpid():
+            _models.clear()
+            _models_pid = os.getpid()
+        if name not in _models:
+            if name == "yunet":
+                _models[name] = cv2.FaceDetectorYN.create(FACE_DETECTOR_MODEL, "", (320, 320), DETECT_SCORE)
+            elif name == "sface":
+                _models[name] = cv2.FaceRecognizerSF.create(FACE_RECOGNIZER_MODEL, "")
+            elif name == "haar":
+                _models[name] = cv2.CascadeClassifier(_haar_cascade_path())
+        return _models[name]
+
+
+def _haar_cascade_path():
+    data = getattr(cv2, "data", None)
+    return os.path.join(data.haarcascades, "haarcascade_frontalface_default.xml") if data else ""
+
+
+def method():
+    """(detector, embedding) available here: YuNet/SFace when their models exist, else Haar cascade/LBP."""
+    if os.path.exists(FACE_DETECTOR_MODEL) and hasattr(cv2, "FaceDetectorYN"):
+        detector = "yunet"
+    elif hasattr(cv2, "CascadeClassifier") and os.path.exists(_haar_cascade_path()):
+        detector = "haar"  # OpenCV 4.x ships the cascades, 5.x doesn't
+    else:
+        detector = None
+    sface = detector == "yunet" and os.path.exists(FACE_RECOGNIZER_MODEL)  # SFace aligns on YuNet's landmarks
+    return detector, "sface" if sface else "lbp"
+
+
+def _bgr(image):
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR) if image.ndim == 2 else image
+
+
+def largest_face(image, detector):
+    """The biggest face in a BGR/gray image as a YuNet-style row (x, y, w, h, 5 landmarks, score), or None."""
+    image = _bgr(image)
+    height, width = image.shape[:2]
+    scale = min(DETECT_MAX_SIDE / max(height, width), 1.0)
+    small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else image
+
+    if detector == "yunet":
+        yunet = _model("yunet")
+        yunet.setInputSize((small.shape[1], small.shape[0]))
+        _, faces = yunet.detect(small)
+        faces = [] if faces is None else [face for face in faces if min(face[2], face[3]) >= MIN_FACE_SIZE]
+    else:
+        gray = cv2.equalizeHist(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+        boxes = _model("haar").detectMultiScale(gray, 1.1, 5, minSize=(MIN_FACE_SIZE, MIN_FACE_SIZE))
+        faces = [np.array(list(box) + [0.0] * 10 + [1.0], dtype=np.float32) for box in boxes]
+    if not len(faces):
+        return None
+    face = max(faces, key=lambda face: face[2] * face[3]).copy()
+    face[:14] /= scale  # Back to the full-size image
+    return face
+
+
+def _lbp_embedding(gray_face):
+    """Uniform LBP histograms over a grid of cells, square-rooted and L2-normalised."""
+    face = cv2.equalizeHist(cv2.resize(gray_face, (LBP_FACE_SIZE, LBP_FACE_SIZE), interpolation=cv2.INTER_AREA))
+    face = face.astype(np.int16)
+    center = face[1:-1, 1:-1]
+    codes = np.zeros(center.shape, dtype=np.uint8)
+    neighbours = [(-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1)]
+    for bit, (dy, dx) in enumerate(neighbours):
+        codes |= (face[1 + dy:face.shape[0] - 1 + dy, 1 + dx:face.shape[1] - 1 + dx] >= center).astype(np.uint8) << bit
+    codes = _UNIFORM_LBP[codes]
+
+    cell = codes.shape[0] // LBP_GRID
+    histograms = [
+        np.bincount(codes[row * cell:(row + 1) * cell, col * cell:(col + 1) * cell].ravel(), minlength=59)
+        for row in range(LBP_GRID) for col in range(LBP_GRID)
+    ]
+    embedding = np.sqrt(np.concatenate(histograms).astype(np.float32))
+    return embedding / (np.linalg.norm(embedding) or 1.0)
+
+
+def _uniform_lbp_table():
+    """Maps the 256 LBP codes to 59 bins: one per uniform pattern (at most 2 bit flips), one for the rest."""
+    table = np.full(256, 58, dtype=np.uint8)
+    uniform = [code for code in range(256) if bin(code ^ ((code >> 1) | ((code & 1) << 7))).count("1") <= 2]
+    table[uniform] = np.arange(len(uniform))
+    return table
+
+
+_UNIFORM_LBP = _uniform_lbp_table()
+
+
+def embed(image, face, embedding):
+    """Embedding vector of a detected face."""
+    if embedding == "sface":
+        recognizer = _model("sface")
+        return recognizer.feature(recognizer.alignCrop(_bgr(image), face)).ravel()
+    x, y, width, height = (int(round(value)) for value in face[:4])
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return _lbp_embedding(gray[max(y, 0):y + height, max(x, 0):x + width])
+
+
+def similarity(first, second):
+    return float(np.dot(first, second) / ((np.linalg.norm(first) * np.linalg.norm(second)) or 1.0))
+
+
+def sample_frames(video_path, count=FACE_MATCH_FRAMES, duration=None):
+    """Yields (seconds, frame) for `count` frames spread evenly over the video, seeking to each (lazy).
+
+    duration: the video's length if already probed (e.g. by video_pipeline.process_video).
+    """
+    import video_pipeline
+
+    if duration is None:
+        duration = video_pipeline.probe(video_path)["duration"]
+    times = [round((index + 0.5) * duration / count, 3) for index in range(count)] if duration > 0 else [0.0]
+    return video_pipeline.iter_keyframes(video_path, times)
+
+
+def match_faces(reference_image, frames, confirmations=None, threshold=None):
+    """Compares the largest face in each frame against the face in the reference (ID card photo).
+
+    frames is an iterable of (seconds, frame); it is consumed lazily and
+    abandoned as soon as `confirmations` frames have matched, so a generator
+    that seeks/decodes on demand stops decoding too. The largest face is used
+    so a held-up ID card in the video doesn't count as the applicant.
+
+    Without the SFace model the status is never match/no_match: once faces
+    were compared it is low_confidence, scores included, for a person to review.
+    """
+    detector, embedding = method()
+    confirmations = confirmations or FACE_MATCH_CONFIRMATIONS
+    threshold = float(threshold or FACE_MATCH_THRESHOLD or MATCH_THRESHOLDS[embedding])
+    result = {"status": UNAVAILABLE, "method": f"{detector}+{embedding}" if detector else None,
+              "threshold": threshold, "best_score": None, "frames_checked": 0, "frames_with_face": 0, "matched_at": []}
+    if detector is None:
+        return result
+
+    reference_face = largest_face(reference_image, detector)
+    if reference_face is None:
+        result["status"] = NO_REFERENCE_FACE
+        return result
+    reference = embed(reference_image, reference_face, embedding)
+
+    best = None
+    for seconds, frame in frames:
+        result["frames_checked"] += 1
+        face = largest_face(frame, detector)
+        if face is None:
+            continue
+        result["frames_with_face"] += 1
+        score = similarity(reference, embed(frame, face, embedding))
+        best = score if best is None else max(best, score)
+        if score >= threshold:
+            result["matched_at"].append(seconds)
+            if len(result["matched_at"]) >= confirmations:
+                break  # Confident: skip the rest of the video
+
+    result["best_score"] = round(best, 4) if best is not None else None
+    if not result["frames_with_face"]:
+        result["status"] = NO_VIDEO_FACE
+    elif embedding != "sface":
+        result["status"] = LOW_CONFIDENCE  # LBP texture similarity can't decide an identity check
+    else:
+        result["status"] = MATCH if len(result["matched_at"]) >= confirmations else NO_MATCH
+    return result
+
+
+def load_document_image(document_path, doc_type=None):
+    """The ID document's photo box (None if the card isn't found) and its whole first page, in grayscale."""
+    from card_ocr import CARD_DPI, card_photo
+
+    page = cv2.imread(document_path, cv2.IMREAD_GRAYSCALE)  # Photographed/scanned card
+    if page is None:  # PDF
+        import fitz
+
+        from ocr_engine import render_page
+
+        with fitz.open(document_path) as doc:
+            with render_page(doc[0], CARD_DPI) as img:
+                page = np.asarray(img)
+    return card_photo(page, doc_type), page
+
+
+def verify_video(video_path, document_path, doc_type=None, frames=FACE_MATCH_FRAMES, duration=None):
+    """Face-matches a KYC video against the photo on an Aadhaar/PAN document; returns match_faces' result."""
+    photo, page = load_document_image(document_path, doc_type)
+    result = None
+    for reference in (photo, page):  # Fall back to the whole page if the photo box has no face (other layout)
+        if reference is None:
+            continue
+        result = match_faces(reference, sample_frames(video_path, frames, duration))
+        if result["status"] != NO_REFERENCE_FACE:
+            break
+    return result
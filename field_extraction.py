@@ -0,0 +1,158 @@
+import re
+from collections import namedtuple
+
+# Bump whenever a pattern or field name changes so cached results are invalidated
+EXTRACTOR_VERSION = "1"
+
+NOT_FOUND = "Not Found"
+
+# pattern/group/flags give the value exactly as the old cascade did. labels are the
+# lower-case literals the pattern starts with (None when it has no fixed label, e.g. dates);
+# the scanner uses them to jump straight to candidate positions.
+FieldSpec = namedtuple("FieldSpec", ["name", "pattern", "labels", "group", "flags"])
+
+# Declarative field registry: doc type keyword -> fields extracted for that document.
+# Doc types are matched by substring in order, so the first keyword found wins
+# (same precedence as the old if/elif cascade in app.extract_details).
+DOC_TYPE_FIELDS = [
+    (("Aadhaar",), [
+        FieldSpec("Full Name", r"Full Name[:\s]+([\w\s]+)", ("full name",), 1, re.IGNORECASE),
+        FieldSpec("DOB", r"\b(\d{2}/\d{2}/\d{4})\b", None, 1, 0),
+        FieldSpec("Gender", r"\b(Male|Female|Other)\b", ("male", "female", "other"), 1, re.IGNORECASE),
+        FieldSpec("Address", r"Address[:\s]+([\w\s,]+)", ("address",), 1, re.IGNORECASE),
+        FieldSpec("Aadhaar Number", r"\b\d{4}\s\d{4}\s\d{4}\b", None, 0, 0),
+    ]),
+    (("PAN",), [
+        FieldSpec("Full Name", r"Name[:\s]+([\w\s]+)", ("name",), 1, re.IGNORECASE),
+        FieldSpec("DOB", r"\b(\d{2}/\d{2}/\d{4})\b", None, 1, 0),
+        FieldSpec("PAN Number", r"[A-Z]{5}[0-9]{4}[A-Z]", None, 0, 0),
+        FieldSpec("Signature", r"Signature[:\s]+([\w\s]+)", ("signature",), 1, re.IGNORECASE),
+        FieldSpec("Tax Status", r"Tax Status[:\s]+([\w\s]+)", ("tax status",), 1, re.IGNORECASE),
+    ]),
+    (("10th Certificate", "12th Certificate"), [
+        FieldSpec("Full Name", r"Name[:\s]+([\w\s]+)", ("name",), 1, re.IGNORECASE),
+        FieldSpec("DOB", r"\b(\d{2}/\d{2}/\d{4})\b", None, 1, 0),
+        FieldSpec("School Name", r"School[:\s]+([\w\s]+)", ("school",), 1, re.IGNORECASE),
+        FieldSpec("Year of Completion", r"Year of Completion[:\s]+(\d{4})", ("year of completion",), 1, 0),
+        FieldSpec("Marks", r"Marks[:\s]+([\d./]+)", ("marks",), 1, 0),
+    ]),
+    (("UG Certificate",), [
+        FieldSpec("Full Name", r"Name[:\s]+([\w\s]+)", ("name",), 1, re.IGNORECASE),
+        FieldSpec("Degree & Major", r"Degree[:\s]+([\w\s]+)", ("degree",), 1, re.IGNORECASE),
+        FieldSpec("University Name", r"University[:\s]+([\w\s]+)", ("university",), 1, re.IGNORECASE),
+        FieldSpec("Year of Completion", r"Year of Completion[:\s]+(\d{4})", ("year of completion",), 1, 0),
+        FieldSpec("CGPA/Marks", r"CGPA[:\s]+([\d./]+)", ("cgpa",), 1, 0),
+    ]),
+    (("Course Fee Structure",), [
+        FieldSpec("Total Fees", r"(Total Fees|Fees Payable)[:\s]+([\d,]+)", ("total fees", "fees payable"), 2, re.IGNORECASE),
+        FieldSpec("Payment Deadlines", r"(Payment Due Date|Payment Deadlines)[:\s]+([\w\s,]+)", ("payment due date", "payment deadlines"), 2, re.IGNORECASE),
+        FieldSpec("Course Duration", r"(Course Duration|Program Length)[:\s]+([\w\s]+)", ("course duration", "program length"), 2, re.IGNORECASE),
+        FieldSpec("Installment Info", r"(Installment Amount|Installment Info)[:\s]+([\w\s,]+)", ("installment amount", "installment info"), 2, re.IGNORECASE),
+    ]),
+    (("Income Proof",), [
+        FieldSpec("Applicant Income", r"Applicant Income[:\s]+([\d,]+)", ("applicant income",), 1, re.IGNORECASE),
+        FieldSpec("Employer Details", r"Employer[:\s]+([\w\s]+)", ("employer",), 1, re.IGNORECASE),
+        FieldSpec("Salary Slips/Tax Returns", r"Salary[:\s]+([\d,]+)", ("salary",), 1, re.IGNORECASE),
+        FieldSpec("Co-Applicant Income", r"Co-Applicant Income[:\s]+([\d,]+)", ("co-applicant income",), 1, re.IGNORECASE),
+    ]),
+    (("Collateral",), [
+        FieldSpec("Property Details", r"Property Details[:\s]+([\w\s,]+)", ("property details",), 1, re.IGNORECASE),
+        FieldSpec("Market Value", r"Market Value[:\s]+([\d,]+)", ("market value",), 1, re.IGNORECASE),
+        FieldSpec("Ownership Proof", r"Ownership Proof[:\s]+([\w\s,]+)", ("ownership proof",), 1, re.IGNORECASE),
+        FieldSpec("Legal Documents", r"Legal Documents[:\s]+([\w\s,]+)", ("legal documents",), 1, re.IGNORECASE),
+        FieldSpec("Mortgage Details", r"Mortgage[:\s]+([\w\s,]+)", ("mortgage",), 1, re.IGNORECASE),
+    ]),
+]
+
+
+class FieldScanner:
+    """Precompiled extractor for all fields of one document type.
+
+    The text is lower-cased once and each labelled field jumps to its label
+    occurrences with str.find, then its pattern is matched anchored at that
+    position. That avoids re.IGNORECASE scans of the whole text (the regex
+    engine can't use its fast literal search with it), while every field still
+    gets the same first match a separate re.search would have found.
+    """
+
+    def __init__(self, fields):
+        self.fields = [
+            (spec.name, re.compile(spec.pattern, spec.flags), spec.labels, spec.group) for spec in fields
+        ]
+
+    def scan(self, text):
+        """Returns {field name: value} for the fields found in the text."""
+        lowered = text.lower()
+        # lower() can change the length of some non-ASCII text, then positions no longer line up
+        use_labels = len(lowered) == len(text)
+
+        found = {}
+        for name, regex, labels, group in self.fields:
+            if labels and use_labels:
+                match = _first_labelled_match(text, lowered, regex, labels)
+            else:
+                match = regex.search(text)
+            if match:
+                found[name] = match.group(group).strip()
+        return found
+
+
+def _first_labelled_match(text, lowered, regex, labels):
+    """Earliest match of regex, trying only the positions where one of its labels occurs."""
+    best = None
+    for label in labels:
+        pos = lowered.find(label)
+        while pos != -1 and (best is None or pos < best.start()):
+            match = regex.match(text, pos)
+            if match:
+                best = match
+                break
+            pos = lowered.find(label, pos + 1)
+    return best
+
+
+# Compiled once at import, one scanner per document type
+_SCANNERS = [(keywords, [spec.name for spec in fields], FieldScanner(fields)) for keywords, fields in DOC_TYPE_FIELDS]
+
+
+def _scanner_for(doc_type):
+    for keywords, names, scanner in _SCANNERS:
+        if any(keyword in doc_type for keyword in keywords):
+            return names, scanner
+    return [], None
+
+
+def field_names(doc_type):
+    """Names of the fields registered for doc_type, in extraction order."""
+    return _scanner_for(doc_type)[0]
+
+
+def extract_fields(text, doc_type):
+    """Extracts the fields registered for doc_type, using "Not Found" for the ones that are missing."""
+    names, scanner = _scanner_for(doc_type)
+    if scanner is None:
+        return {}
+    found = scanner.scan(text)
+    return {name: found.get(name, NOT_FOUND) for name in names}
+
+
+# Phrases that identify a document type in OCR text, checked in order (the first match wins).
+# The names match the chatbot's doc types so they select the fields registered above.
+DOC_TYPE_CUES = [
+    ("Aadhaar Card", re.compile(r"aadhaar|unique identification authority", re.IGNORECASE)),
+    ("PAN Card", re.compile(r"income tax department|permanent account number", re.IGNORECASE)),
+    ("12th Certificate", re.compile(r"\b12th\b|higher secondary|class xii\b", re.IGNORECASE)),
+    ("10th Certificate", re.compile(r"\b10th\b|secondary school|class x\b", re.IGNORECASE)),
+    ("UG Certificate", re.compile(r"\bbachelor|\bdegree\b|\bcgpa\b", re.IGNORECASE)),
+    ("Course Fee Structure", re.compile(r"fee structure|total fees|fees payable|tuition", re.IGNORECASE)),
+    ("Income Proof", re.compile(r"applicant income|salary|employer", re.IGNORECASE)),
+    ("Collateral Documents", re.compile(r"collateral|property details|mortgage", re.IGNORECASE)),
+]
+
+
+def detect_doc_type(text):
+    """Guesses the document type from its text, or None when nothing identifies it."""
+    for doc_type, cue in DOC_TYPE_CUES:
+        if cue.search(text):
+            return doc_type
+    return None
@@ -0,0 +1,105 @@
+import cv2
+import numpy as np
+
+# Imported lazily by ocr_engine (OpenCV takes a while to load), so module-level imports are fine here.
+
+# Bump whenever a step below changes its output so cached OCR text is invalidated
+PREPROCESS_VERSION = "1"
+
+A4_LONG_SIDE_INCHES = 11.69  # Used to guess the DPI of photos/scans that don't record one
+MAX_SKEW_DEGREES = 10.0
+MIN_SKEW_DEGREES = 0.3  # Smaller angles don't bother Tesseract, skip the rotation
+SKEW_SAMPLE_POINTS = 20000
+THRESHOLD_BLOCK_INCHES = 0.15  # Adaptive threshold neighbourhood, about a few characters wide
+THRESHOLD_C = 15
+CROP_MARGIN_INCHES = 0.1
+CROP_MIN_INK_INCHES = 0.02
+
+
+def estimate_dpi(gray, dpi=None):
+    """The image's resolution: its recorded DPI if known, otherwise assuming it shows an A4 page."""
+    return dpi or max(gray.shape) / A4_LONG_SIDE_INCHES
+
+
+def downscale(gray, source_dpi, target_dpi):
+    """Shrinks an image scanned/photographed above target_dpi (Tesseract gains nothing from the extra pixels)."""
+    if source_dpi <= target_dpi * 1.1:
+        return gray
+    scale = target_dpi / source_dpi
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def _ink(gray):
+    """Binary mask (255 = ink): local threshold, so shading isn't mistaken for ink, then specks removed."""
+    ink = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 31, THRESHOLD_C)
+    return cv2.morphologyEx(ink, cv2.MORPH_OPEN, np.ones((2, 2), np.uint8))
+
+
+def _profile_scores(ys, xs, angles):
+    """Sharpness of the horizontal projection profile of the ink points for every candidate angle at once."""
+    radians = np.deg2rad(angles)[:, None]
+    rotated = ys[None, :] * np.cos(radians) + xs[None, :] * np.sin(radians)  # (angles, points)
+    rows = np.round(rotated - rotated.min(axis=1, keepdims=True)).astype(np.int64)
+    bins = int(rows.max()) + 1
+    counts = np.bincount((rows + np.arange(len(angles))[:, None] * bins).ravel(), minlength=len(angles) * bins)
+    counts = counts.reshape(len(angles), bins).astype(np.float64)
+    return (counts ** 2).sum(axis=1)  # Text lines aligned with the rows give the spikiest profile
+
+
+def estimate_skew(gray):
+    """Skew angle of the text in degrees (positive = rotated counter-clockwise), by projection profiles."""
+    ys, xs = np.nonzero(_ink(gray))
+    if len(ys) < 100:
+        return 0.0
+    if len(ys) > SKEW_SAMPLE_POINTS:
+        pick = np.random.default_rng(0).choice(len(ys), SKEW_SAMPLE_POINTS, replace=False)
+        ys, xs = ys[pick], xs[pick]
+    ys = ys.astype(np.float64)
+    xs = xs.astype(np.float64)
+
+    # Coarse search over the whole range, then refine around the best angle
+    angles = np.arange(-MAX_SKEW_DEGREES, MAX_SKEW_DEGREES + 0.5, 0.5)
+    best = angles[np.argmax(_profile_scores(ys, xs, angles))]
+    angles = np.arange(best - 0.5, best + 0.55, 0.05)
+    return float(angles[np.argmax(_profile_scores(ys, xs, angles))])
+
+
+def deskew(gray):
+    """Rotates the page so its text lines are horizontal."""
+    angle = estimate_skew(gray)
+    if abs(angle) < MIN_SKEW_DEGREES:
+        return gray
+    height, width = gray.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), -angle, 1.0)
+    # Replicate the edges: a white fill next to a shaded page would threshold into long fake "ink" lines
+    return cv2.warpAffine(gray, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def binarize(gray, dpi):
+    """Adaptive (local) threshold: copes with shadows and uneven lighting that defeat a global one."""
+    block = max(3, int(dpi * THRESHOLD_BLOCK_INCHES) | 1)  # Must be odd
+    return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block, THRESHOLD_C)
+
+
+def crop_to_text(binary, dpi):
+    """Crops a binarized page to the bounding box of its ink (plus a margin), dropping specks first."""
+    ink = cv2.morphologyEx(255 - binary, cv2.MORPH_OPEN, np.ones((2, 2), np.uint8)) > 0
+    # Rows/columns crossing text hold far more ink than the odd surviving speck
+    min_ink = max(1, int(dpi * CROP_MIN_INK_INCHES))
+    rows = np.flatnonzero(ink.sum(axis=1) >= min_ink)
+    cols = np.flatnonzero(ink.sum(axis=0) >= min_ink)
+    if len(rows) == 0:
+        return binary
+    margin = int(dpi * CROP_MARGIN_INCHES)
+    top, bottom = max(rows[0] - margin, 0), min(rows[-1] + margin + 1, binary.shape[0])
+    left, right = max(cols[0] - margin, 0), min(cols[-1] + margin + 1, binary.shape[1])
+    return binary[top:bottom, left:right]
+
+
+def preprocess(gray, source_dpi=None, target_dpi=200):
+    """Downscale, deskew, adaptive threshold and crop a grayscale page (uint8 array) for Tesseract."""
+    source_dpi = estimate_dpi(gray, source_dpi)
+    gray = downscale(gray, source_dpi, target_dpi)
+    dpi = min(source_dpi, target_dpi)
+    gray = deskew(gray)
+    return crop_to_text(binarize(gray, dpi), dpi)
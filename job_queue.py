@@ -0,0 +1,206 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import event_log
+import sqlite_db
+
+# --- JOB QUEUE SETTINGS (override with environment variables) ---
+JOB_DB = os.environ.get("JOB_DB", "jobs.sqlite3")
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+# A running job, and a queued one waiting for a pool worker, touches its row this often
+JOB_HEARTBEAT_SECONDS = float(os.environ.get("JOB_HEARTBEAT_SECONDS", 10))
+JOB_STALE_SECONDS = float(os.environ.get("JOB_STALE_SECONDS", 60))  # Untouched for this long: its worker is gone
+JOB_REAP_INTERVAL = float(os.environ.get("JOB_REAP_INTERVAL", 30))  # How often each process looks for stale jobs
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+log = event_log.get_logger("job_queue")
+
+
+def _connect(db_path):
+    return sqlite_db.connect(db_path, [
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        "id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL, "
+        "result TEXT, error TEXT, created REAL NOT NULL, updated REAL NOT NULL)",
+    ])
+
+
+def _update(db_path, job_id, status, result=None, error=None):
+    conn = _connect(db_path)
+    with conn:
+        conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, updated = ? WHERE id = ?",
+            (status, result, error, time.time(), job_id),
+        )
+
+
+def _claim(db_path, job_id):
+    """Marks a queued job as running; False if another worker already has it (a job can be queued twice)."""
+    conn = _connect(db_path)
+    with conn:
+        return conn.execute(
+            "UPDATE jobs SET status = ?, updated = ? WHERE id = ? AND status = ?", (RUNNING, time.time(), job_id, QUEUED)
+        ).rowcount == 1
+
+
+def _heartbeat(db_path, job_id, stop):
+    conn = _connect(db_path)
+    while not stop.wait(JOB_HEARTBEAT_SECONDS):
+        with conn:
+            conn.execute("UPDATE jobs SET updated = ? WHERE id = ? AND status = ?", (time.time(), job_id, RUNNING))
+
+
+def _run_job(db_path, job_id, handler, payload):
+    """Executed in a worker process: runs the handler and records its outcome in the job table."""
+    if not _claim(db_path, job_id):
+        return
+    stop = threading.Event()
+    threading.Thread(target=_heartbeat, args=(db_path, job_id, stop), daemon=True).start()
+    try:
+        result = handler(**payload)
+    except Exception as e:
+        _update(db_path, job_id, FAILED, error=f"{type(e).__name__}: {e}")
+        log.exception("Job %s failed", job_id)
+        return
+    finally:
+        stop.set()
+    _update(db_path, job_id, DONE, result=json.dumps(result))
+
+
+class JobQueue:
+    """Background job queue backed by a SQLite job table and a local process pool.
+
+    submit() records the job and returns its id immediately; a worker process
+    runs `handler(**payload)` and stores the JSON result. Status lives on disk,
+    so any web worker process can answer status polls without a broker.
+
+    A running job refreshes its `updated` time every JOB_HEARTBEAT_SECONDS, and
+    so does the submitting process for its jobs still queued behind a busy pool.
+    Jobs whose process died with them (a recycled or crashed web worker) stop
+    being refreshed and are picked up again by requeue_stale().
+    """
+
+    def __init__(self, handler, db_path=JOB_DB, workers=JOB_WORKERS):
+        self.handler = handler
+        self.db_path = db_path
+        self.workers = workers
+        self._executor = None
+        self._executor_pid = None
+        self._reaper_pid = None
+        self._pending = set()  # Ids of this process's jobs in its pool that haven't finished
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created lazily (and again after a fork) so a preforking server doesn't share a dead pool
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._executor_pid = os.getpid()
+                self._pending = set()  # The parent's jobs are its own to keep alive
+                threading.Thread(target=self._heartbeat_queued, name="job-heartbeat", daemon=True).start()
+            return self._executor
+
+    def _dispatch(self, job_id, payload):
+        future = self._get_executor().submit(_run_job, self.db_path, job_id, self.handler, payload)
+        with self._lock:
+            self._pending.add(job_id)
+        future.add_done_callback(lambda _: self._done(job_id))
+
+    def _done(self, job_id):
+        with self._lock:
+            self._pending.discard(job_id)
+
+    def _heartbeat_queued(self):
+        """Keeps this process's queued jobs from looking stale while they wait for a pool worker."""
+        pid = os.getpid()
+        while self._executor_pid == pid:
+            time.sleep(JOB_HEARTBEAT_SECONDS)
+            with self._lock:
+                pending = list(self._pending)
+            if not pending:
+                continue
+            try:
+                conn = _connect(self.db_path)
+                with conn:
+                    now = time.time()
+                    conn.executemany(
+                        "UPDATE jobs SET updated = ? WHERE id = ? AND status = ?",
+                        [(now, job_id, QUEUED) for job_id in pending],
+                    )
+            except Exception:
+                log.exception("Could not refresh queued jobs")  # Try again next round
+
+    def submit(self, **payload):
+        """Queues a job and returns its id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = _connect(self.db_path)
+        with conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, payload, created, updated) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(payload), now, now),
+            )
+        self._dispatch(job_id, payload)
+        return job_id
+
+    def get(self, job_id):
+        """Returns {"id", "status", "result", "error"} for a job, or None if it doesn't exist."""
+        row = _connect(self.db_path).execute(
+            "SELECT status, result, error FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, result, error = row
+        return {"id": job_id, "status": status, "result": json.loads(result) if result else None, "error": error}
+
+    def resume(self):
+        """Re-queues jobs left queued or running by a previous process (e.g. after a crash or restart).
+
+        Only jobs that are already stale: a job still heartbeating may belong to
+        a live process (an old master during a USR2 upgrade); the reaper gets it later if not.
+        """
+        return self.requeue_stale()
+
+    def requeue_stale(self, stale_seconds=JOB_STALE_SECONDS):
+        """Re-queues queued/running jobs nobody has touched for stale_seconds (their process is gone); returns how many.
+
+        Each stale row is taken over with a conditional UPDATE, so when several
+        processes look at the same time only one of them re-queues it.
+        """
+        conn = _connect(self.db_path)
+        rows = conn.execute(
+            "SELECT id, payload, status, updated FROM jobs WHERE status IN (?, ?) AND updated <= ?",
+            (QUEUED, RUNNING, time.time() - stale_seconds),
+        ).fetchall()
+        requeued = 0
+        for job_id, payload, status, updated in rows:
+            with conn:
+                taken = conn.execute(
+                    "UPDATE jobs SET status = ?, updated = ? WHERE id = ? AND status = ? AND updated = ?",
+                    (QUEUED, time.time(), job_id, status, updated),
+                ).rowcount == 1
+            if taken:
+                self._dispatch(job_id, json.loads(payload))
+                requeued += 1
+        return requeued
+
+    def start_reaper(self, interval=JOB_REAP_INTERVAL):
+        """Runs requeue_stale every `interval` seconds in a background thread of this process (once per process)."""
+        with self._lock:
+            if self._reaper_pid == os.getpid():
+                return
+            self._reaper_pid = os.getpid()
+
+        def reap():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.requeue_stale()
+                except Exception:
+                    log.exception("Could not re-queue stale jobs")  # Try again next round
+
+        threading.Thread(target=reap, name="job-reaper", daemon=True).start()
@@ -0,0 +1,99 @@
+import os
+from datetime import datetime, timezone
+
+from flask import Response, request
+from werkzeug.exceptions import NotFound
+from werkzeug.http import http_date, is_resource_modified
+from werkzeug.security import safe_join
+
+# --- MEDIA SETTINGS (override with environment variables) ---
+MEDIA_MAX_AGE = int(os.environ.get("MEDIA_MAX_AGE", 3600))  # Browser cache lifetime in seconds
+MEDIA_CHUNK_SIZE = int(os.environ.get("MEDIA_CHUNK_SIZE", 256 * 1024))  # Read size when sendfile isn't available
+
+CONTENT_TYPES = {
+    ".mp4": "video/mp4", ".webm": "video/webm", ".mov": "video/quicktime", ".mkv": "video/x-matroska",
+    ".jpg": "image/jpeg",
+}
+
+
+def _read_range(file, length):
+    """Yields `length` bytes from the file's current position, then closes it."""
+    try:
+        while length > 0:
+            chunk = file.read(min(MEDIA_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def _body(file, length):
+    """Response body for `length` bytes from the file's current position.
+
+    Under gunicorn the file goes through wsgi.file_wrapper, which sendfile()s
+    from the current offset for exactly Content-Length bytes (zero-copy, also
+    for ranges). Other servers' file wrappers may send the rest of the file
+    regardless, so they get a bounded generator instead.
+    """
+    file_wrapper = request.environ.get("wsgi.file_wrapper")
+    if file_wrapper is not None and request.environ.get("SERVER_SOFTWARE", "").startswith("gunicorn"):
+        return file_wrapper(file, MEDIA_CHUNK_SIZE)
+    return _read_range(file, length)
+
+
+def _if_range_matches(etag, mtime):
+    """If-Range: a range is only honoured if the client's partial copy is still the current file."""
+    if "If-Range" not in request.headers:
+        return True
+    if_range = request.if_range
+    if if_range.etag is not None:
+        return if_range.etag == etag
+    return if_range.date is not None and int(mtime) <= if_range.date.timestamp()
+
+
+def send_media(folder, filename, max_age=MEDIA_MAX_AGE, private=False):
+    """Serves a media file with HTTP Range (single ranges: 206/416), ETag/Last-Modified revalidation and cache headers.
+
+    private: the file belongs to one applicant (their uploads and renditions). Shared
+    caches (proxies, CDNs) must not keep it and the browser revalidates it each time.
+    """
+    file_path = safe_join(folder, filename)
+    if file_path is None or not os.path.isfile(file_path):
+        raise NotFound()
+
+    stat = os.stat(file_path)
+    size = stat.st_size
+    modified = datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+    etag = f"{stat.st_mtime_ns:x}-{size:x}"
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{etag}"',
+        "Last-Modified": http_date(modified),
+        "Cache-Control": "private, no-cache" if private else f"public, max-age={max_age}",
+    }
+    content_type = CONTENT_TYPES.get(os.path.splitext(filename)[1].lower(), "application/octet-stream")
+
+    if not is_resource_modified(request.environ, etag=etag, last_modified=modified, ignore_if_range=True):
+        return Response(status=304, headers=headers)
+
+    start, stop, status = 0, size, 200
+    # Multi-range requests are answered with the whole file, which RFC 9110 allows instead of multipart/byteranges
+    if request.range is not None and len(request.range.ranges) == 1 and _if_range_matches(etag, stat.st_mtime):
+        byte_range = request.range.range_for_length(size)
+        if byte_range is None:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status=416, headers=headers)
+        start, stop = byte_range
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+
+    headers["Content-Length"] = str(stop - start)
+    if request.method == "HEAD":
+        return Response(status=status, headers=headers, content_type=content_type)
+
+    file = open(file_path, "rb")
+    file.seek(start)
+    return Response(_body(file, stop - start), status=status, headers=headers, content_type=content_type,
+                    direct_passthrough=True)
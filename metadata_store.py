@@ -0,0 +1,140 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import sqlite_db
+
+# --- METADATA SETTINGS (override with environment variables) ---
+METADATA_DB = os.environ.get("METADATA_DB", "documents.sqlite3")
+
+COLUMNS = ("applicant", "filename", "file_path", "file_type", "doc_type", "sha256", "size", "timestamp", "extracted_data")
+
+
+class MetadataStore:
+    """Uploaded-document records in SQLite (WAL), indexed by applicant, filename and doc_type.
+
+    Each upload is one INSERT instead of a rewrite of a JSON array, and WAL mode
+    lets every web and job worker process write concurrently.
+    """
+
+    def __init__(self, path=METADATA_DB):
+        self.path = path
+
+    def _connection(self):
+        return sqlite_db.connect(self.path, [
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "id INTEGER PRIMARY KEY, applicant TEXT NOT NULL DEFAULT '', filename TEXT NOT NULL, "
+            "file_path TEXT NOT NULL, file_type TEXT NOT NULL, doc_type TEXT, sha256 TEXT, size INTEGER, "
+            "timestamp TEXT NOT NULL, extracted_data TEXT, "
+            "UNIQUE (applicant, file_path, timestamp))",
+            "CREATE INDEX IF NOT EXISTS documents_applicant ON documents (applicant, doc_type)",
+            "CREATE INDEX IF NOT EXISTS documents_filename ON documents (filename)",
+            "CREATE INDEX IF NOT EXISTS documents_doc_type ON documents (doc_type)",
+        ])
+
+    def _row(self, record, applicant):
+        extracted_data = record.get("extracted_data")
+        return (
+            applicant or record.get("applicant") or "",
+            record.get("filename") or os.path.basename(record["file_path"]),
+            record["file_path"],
+            record["file_type"],
+            record.get("doc_type"),
+            record.get("sha256"),
+            record.get("size"),
+            record.get("timestamp") or datetime.now().isoformat(),
+            json.dumps(extracted_data) if extracted_data is not None else None,
+        )
+
+    def add(self, record, applicant=None):
+        """Stores one file record (the dict built by process_saved_document) and returns its id."""
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                f"INSERT OR REPLACE INTO documents ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                self._row(record, applicant),
+            )
+        return cursor.lastrowid
+
+    def find(self, applicant=None, filename=None, doc_type=None, limit=100):
+        """Most recent records matching every given filter, newest first."""
+        filters = {"applicant": applicant, "filename": filename, "doc_type": doc_type}
+        where = [f"{column} = ?" for column, value in filters.items() if value is not None]
+        rows = self._connection().execute(
+            f"SELECT id, {', '.join(COLUMNS)} FROM documents"
+            f"{' WHERE ' + ' AND '.join(where) if where else ''} ORDER BY id DESC LIMIT ?",
+            [value for value in filters.values() if value is not None] + [limit],
+        ).fetchall()
+        records = []
+        for row in rows:
+            record = dict(zip(("id",) + COLUMNS, row))
+            if record["extracted_data"] is not None:
+                record["extracted_data"] = json.loads(record["extracted_data"])
+            records.append(record)
+        return records
+
+    def import_json(self, records_path, extracted_path=None, applicant=None):
+        """Imports a legacy files_data.json array; returns how many new records were added.
+
+        extracted_path optionally points at the old extracted_data.json, a series of
+        concatenated {filename: fields} objects, whose fields are attached by filename.
+        Records already imported are skipped, so the import can be re-run safely.
+        """
+        with open(records_path, encoding="utf-8") as records_file:
+            records = json.load(records_file)
+
+        extracted = {}
+        if extracted_path:
+            extracted = _read_concatenated_json(extracted_path)
+
+        rows = []
+        for record in records:
+            record = dict(record)
+            if "extracted_data" not in record and record.get("filename") in extracted:
+                record["extracted_data"] = extracted[record["filename"]]
+            rows.append(self._row(record, applicant))
+
+        conn = self._connection()
+        with conn:
+            before = conn.total_changes
+            conn.executemany(
+                f"INSERT OR IGNORE INTO documents ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows
+            )
+            return conn.total_changes - before
+
+
+def _read_concatenated_json(path):
+    """Parses back-to-back JSON objects (what repeated json.dump appends produced) into {filename: fields}."""
+    with open(path, encoding="utf-8") as file:
+        text = file.read()
+    decoder = json.JSONDecoder()
+    fields_by_filename = {}
+    position = 0
+    while True:
+        while position < len(text) and text[position].isspace():
+            position += 1
+        if position >= len(text):
+            return fields_by_filename
+        value, position = decoder.raw_decode(text, position)
+        for filename, fields in value.items():
+            if isinstance(fields, dict):  # Skip flat objects that aren't keyed by filename
+                fields_by_filename[filename] = fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import legacy files_data.json records into the metadata store.")
+    parser.add_argument("records", nargs="?", default="files_data.json", help="JSON array of file records")
+    parser.add_argument("--extracted", help="old extracted_data.json to attach extracted fields from")
+    parser.add_argument("--applicant", help="applicant/session id to file the records under")
+    parser.add_argument("--db", default=METADATA_DB, help="metadata database")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    added = MetadataStore(args.db).import_json(args.records, args.extracted, args.applicant)
+    print(f"✅ Imported {added} record(s) from '{args.records}' into '{args.db}' in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import event_log
+import sqlite_db
+from field_extraction import DOC_TYPE_CUES
+
+# --- METRICS SETTINGS (override with environment variables) ---
+METRICS_DB = os.environ.get("METRICS_DB", "metrics.sqlite3")  # Shared by the web, job and OCR pool processes
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+
+STAGE_HISTOGRAM = "document_stage_seconds"
+# Upper bounds in seconds; the last bucket (+Inf) is implicit. Spans a regex pass (ms) to OCR of a big scan.
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"  # Prometheus text exposition format
+
+# doc_type labels are limited to the known document types so client-supplied names can't explode the series
+# (the chatbot's video steps are all "Video", whatever they ask for)
+LABELLED_DOC_TYPES = ["Video"] + [doc_type for doc_type, _ in DOC_TYPE_CUES]
+
+log = event_log.get_logger("metrics")
+
+
+def _connect():
+    # Autocommit, and losing the last observations in a power cut is fine
+    return sqlite_db.connect(METRICS_DB, [
+        "CREATE TABLE IF NOT EXISTS stage_timings ("
+        "stage TEXT NOT NULL, doc_type TEXT NOT NULL, bucket INTEGER NOT NULL, "
+        "count INTEGER NOT NULL, total REAL NOT NULL, PRIMARY KEY (stage, doc_type, bucket))",
+    ], isolation_level=None, synchronous="NORMAL")
+
+
+def doc_type_label(doc_type):
+    """The known document type doc_type refers to ("Please upload any Collateral Documents..." included)."""
+    if not doc_type:
+        return "unknown"
+    for known in LABELLED_DOC_TYPES:
+        if known.lower() in doc_type.lower():
+            return known
+    return "other"
+
+
+def observe(stage, seconds, doc_type=None):
+    """Records one duration of a pipeline stage (one row update in the shared metrics database)."""
+    if not METRICS_ENABLED:
+        return
+    bucket = next((index for index, bound in enumerate(BUCKETS) if seconds <= bound), len(BUCKETS))
+    try:
+        _connect().execute(
+            "INSERT INTO stage_timings (stage, doc_type, bucket, count, total) VALUES (?, ?, ?, 1, ?) "
+            "ON CONFLICT (stage, doc_type, bucket) DO UPDATE SET count = count + 1, total = total + excluded.total",
+            (stage, doc_type_label(doc_type), bucket, seconds),
+        )
+    except sqlite3.Error as e:
+        log.warning("⚠️ Could not record %s timing: %s", stage, e)  # Metrics must never break an upload
+
+
+@contextmanager
+def timer(stage, doc_type=None):
+    """Times the with-block as one observation of `stage` (also when it raises)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - started, doc_type)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render():
+    """All stage histograms in the Prometheus text format, aggregated over every process that recorded them."""
+    lines = [
+        f"# HELP {STAGE_HISTOGRAM} Time spent in each document pipeline stage, by document type.",
+        f"# TYPE {STAGE_HISTOGRAM} histogram",
+    ]
+    if not METRICS_ENABLED:
+        return "\n".join(lines) + "\n"
+    rows = _connect().execute(
+        "SELECT stage, doc_type, bucket, count, total FROM stage_timings ORDER BY stage, doc_type, bucket"
+    ).fetchall()
+
+    series = {}
+    for stage, doc_type, bucket, count, total in rows:
+        counts, totals = series.setdefault((stage, doc_type), ([0] * (len(BUCKETS) + 1), [0.0]))
+        counts[bucket] += count
+        totals[0] += total
+
+    for (stage, doc_type), (counts, totals) in series.items():
+        labels = f'stage="{_escape(stage)}",doc_type="{_escape(doc_type)}"'
+        cumulative = 0
+        for bound, count in zip([str(bound) for bound in BUCKETS] + ["+Inf"], counts):
+            cumulative += count
+            lines.append(f'{STAGE_HISTOGRAM}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{STAGE_HISTOGRAM}_sum{{{labels}}} {totals[0]:.6f}")
+        lines.append(f"{STAGE_HISTOGRAM}_count{{{labels}}} {cumulative}")
+    return "\n".join(lines) + "\n"
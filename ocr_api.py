@@ -1,35 +1,247 @@
-from flask import Flask, request, jsonify
-import pytesseract
-from PIL import Image
+from flask import Flask, Request, Response, request, jsonify
+import io
 import os
+import json
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from werkzeug.utils import secure_filename
+
+import event_log
+import metrics
+from field_extraction import detect_doc_type, extract_fields
+from uploads import DOCUMENT_MAX_BYTES
+
+class InMemoryUploadRequest(Request):
+    """Keeps /upload's document in memory; Werkzeug would spool anything over 500 KB to a temp file."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint == 'process_document':
+            return io.BytesIO()  # Bounded by the max_content_length set in the view
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+log = event_log.get_logger("ocr_api")
 
 app = Flask(__name__)
+app.request_class = InMemoryUploadRequest
 
 UPLOAD_FOLDER = 'processed_documents'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+OCR_API_PORT = int(os.environ.get("OCR_API_PORT", 5000))
+
+# Copy of each /upload document in UPLOAD_FOLDER: "async" (after the response), "sync" or "none"
+OCR_API_PERSIST = os.environ.get("OCR_API_PERSIST", "async")
+
+# Batch OCR (/upload/batch): worker processes, request size, and how much/into how many files its zips may expand
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", os.cpu_count() or 1))
+BATCH_MAX_BYTES = int(os.environ.get("BATCH_MAX_BYTES", 100 * 1024 * 1024))
+ZIP_MAX_BYTES = int(os.environ.get("ZIP_MAX_BYTES", 200 * 1024 * 1024))  # All zips of one request together
+ZIP_MAX_MEMBERS = int(os.environ.get("ZIP_MAX_MEMBERS", 500))
+
+class UnsupportedDocument(ValueError):
+    pass
+
+def ocr_document_bytes(data, doc_type=None):
+    """OCRs a document held in memory, routing by content: PDFs through the rasterizer, images to Tesseract.
+
+    doc_type (when known) picks its Tesseract config, see ocr_engine.tesseract_config.
+    """
+    if data[:5] == b'%PDF-':
+        import ocr_engine
+        return ocr_engine.extract_pdf_text(stream=data, doc_type=doc_type)
+
+    # PIL is imported on first use to keep startup fast
+    from PIL import Image, UnidentifiedImageError
+    import ocr_engine
+
+    try:
+        image = Image.open(io.BytesIO(data))
+    except UnidentifiedImageError:
+        raise UnsupportedDocument("Unsupported document type, upload a PDF or an image") from None
+    with image:
+        return ocr_engine.ocr_image(image, doc_type=doc_type)
+
+def persist_document(data, filename):
+    """Writes an uploaded document to UPLOAD_FOLDER under a sanitized version of its client-supplied name."""
+    file_path = os.path.join(UPLOAD_FOLDER, secure_filename(filename) or "document")
+    with metrics.timer("upload_write"), open(file_path, 'wb') as file:
+        file.write(data)
+
 @app.route('/upload', methods=['POST'])
 def process_document():
+    request.max_content_length = DOCUMENT_MAX_BYTES  # The document is buffered in memory, cap its size
     if 'document' not in request.files:
         return jsonify({"error": "No document uploaded"}), 400
     
     file = request.files['document']
-    file_path = os.path.join(UPLOAD_FOLDER, file.filename)
-    file.save(file_path)
-
-    # Perform OCR
-    image = Image.open(file_path)
-    extracted_text = pytesseract.image_to_string(image)
-
-    # Dummy extraction logic (Replace with NLP models if needed)
-    key_details = {
-        "name": "Extracted Name Placeholder",
-        "dob": "01-01-1990",
-        "income": "50000",
-        "employment_type": "Salaried"
+    data = file.read()  # Already in memory (InMemoryUploadRequest), nothing is saved and re-opened
+    if OCR_API_PERSIST == "sync":
+        persist_document(data, file.filename)
+
+    # Perform OCR straight from the buffer (its stages are timed in ocr_engine, see /metrics)
+    started = time.perf_counter()
+    try:
+        extracted_text = ocr_document_bytes(data, request.form.get('doc_type') or None)
+    except UnsupportedDocument as e:
+        return jsonify({"error": str(e)}), 415
+
+    # Same extraction as /upload/batch: the doc_type form field, or the type detected from the text
+    doc_type, key_details = extract_key_details(extracted_text, request.form.get('doc_type'))
+    log.debug("Extracted text of '%s' (%s): %s", file.filename, doc_type, event_log.excerpt(extracted_text),
+              extra={"event": "extracted_text"})
+    metrics.observe("document_total", time.perf_counter() - started, doc_type)
+
+    response = jsonify({"extracted_text": extracted_text, "doc_type": doc_type, "key_details": key_details})
+    if OCR_API_PERSIST == "async":
+        # Runs once the response has been sent, the client doesn't wait for the disk write
+        response.call_on_close(lambda: persist_document(data, file.filename))
+    return response
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    """Shared batch OCR pool, created lazily (and again after a fork, e.g. in each gunicorn worker)."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(max_workers=BATCH_WORKERS)
+            _executor_pid = os.getpid()
+        return _executor
+
+def extract_key_details(extracted_text, doc_type=None):
+    """(doc_type, fields) for an OCR text; doc_type is detected when not given ({} if it can't be)."""
+    doc_type = doc_type or detect_doc_type(extracted_text)
+    key_details = {}
+    if doc_type:
+        with metrics.timer("regex_extraction", doc_type):
+            key_details = extract_fields(extracted_text, doc_type)
+    return doc_type, key_details
+
+def ocr_file(file_path, filename, doc_type=None):
+    """Runs in a batch worker process: OCRs one saved file (image or PDF) and extracts its fields."""
+    started = time.perf_counter()
+    with open(file_path, 'rb') as file:
+        extracted_text = ocr_document_bytes(file.read(), doc_type)
+
+    doc_type, key_details = extract_key_details(extracted_text, doc_type)
+    log.debug("Extracted text of '%s' (%s): %s", filename, doc_type, event_log.excerpt(extracted_text),
+              extra={"event": "extracted_text"})
+    elapsed = time.perf_counter() - started
+    metrics.observe("document_total", elapsed, doc_type)
+    return {
+        "filename": filename,
+        "doc_type": doc_type,
+        "extracted_text": extracted_text,
+        "key_details": key_details,
+        "ocr_ms": round(elapsed * 1000, 1),
     }
 
-    return jsonify({"extracted_text": extracted_text, "key_details": key_details})
+def _is_zip(file):
+    return file.filename.lower().endswith('.zip') or file.mimetype in ('application/zip', 'application/x-zip-compressed')
+
+def _save_batch_files(files, folder):
+    """Saves uploaded files into folder, expanding zip archives; returns [(path, original filename)].
+
+    The zips' sizes and member counts are checked from their directories before anything is extracted.
+    """
+    saved = []
+    expanded_bytes = 0
+    members_total = 0
+    for number, file in enumerate(files):
+        upload_path = os.path.join(folder, f"upload-{number}")
+        file.save(upload_path)
+        if not _is_zip(file):
+            saved.append((upload_path, file.filename))
+            continue
+
+        with zipfile.ZipFile(upload_path) as archive:
+            members = [
+                info for info in archive.infolist()
+                if not info.is_dir() and not os.path.basename(info.filename).startswith('.')
+            ]
+            expanded_bytes += sum(info.file_size for info in members)
+            members_total += len(members)
+            if expanded_bytes > ZIP_MAX_BYTES:
+                raise ValueError(f"The zip files expand to more than {ZIP_MAX_BYTES // (1024 * 1024)} MB")
+            if members_total > ZIP_MAX_MEMBERS:
+                raise ValueError(f"The zip files hold more than {ZIP_MAX_MEMBERS} documents")
+            for info in members:
+                member_path = os.path.join(folder, f"member-{len(saved)}")
+                with archive.open(info) as source, open(member_path, 'wb') as target:
+                    shutil.copyfileobj(source, target)
+                saved.append((member_path, info.filename))
+        os.remove(upload_path)
+    return saved
+
+@app.route('/upload/batch', methods=['POST'])
+def process_batch():
+    """OCRs many documents (several files and/or zip archives) in parallel, streaming NDJSON results.
+
+    One JSON line is sent per document as soon as it's done, so lines arrive in completion
+    order; "index" gives each document's position in the upload. An optional "doc_type"
+    form field applies to every document, otherwise the type is detected from the text.
+    """
+    request.max_content_length = BATCH_MAX_BYTES  # Before the body is parsed (and spooled to disk)
+    files = [file for file in request.files.getlist('documents') + request.files.getlist('document') if file.filename]
+    if not files:
+        return jsonify({"error": "No documents uploaded"}), 400
+    doc_type = request.form.get('doc_type')
+
+    folder = tempfile.mkdtemp(prefix="ocr-batch-")
+    try:
+        with metrics.timer("upload_write", doc_type):
+            saved = _save_batch_files(files, folder)
+    except (ValueError, zipfile.BadZipFile) as e:
+        shutil.rmtree(folder, ignore_errors=True)
+        return jsonify({"error": str(e)}), 400
+    except Exception:
+        shutil.rmtree(folder, ignore_errors=True)
+        raise
+
+    def results():
+        futures = {}
+        try:
+            executor = _get_executor()
+            for index, (path, filename) in enumerate(saved):
+                futures[executor.submit(ocr_file, path, filename, doc_type)] = (index, filename)
+            for future in as_completed(futures):
+                index, filename = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    log.warning("Batch OCR of '%s' failed", filename, exc_info=e)
+                    result = {"filename": filename, "error": f"{type(e).__name__}: {e}"}
+                result["index"] = index
+                yield json.dumps(result) + "\n"
+        finally:
+            for future in futures:
+                future.cancel()  # Client went away: don't OCR what's still queued
+            shutil.rmtree(folder, ignore_errors=True)
+
+    return Response(results(), mimetype="application/x-ndjson")
+
+@app.errorhandler(413)
+def upload_too_large(error):
+    """Oversized /upload or /upload/batch request bodies, as JSON like the other errors."""
+    return jsonify({"error": "Upload too large"}), 413
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Per-stage latency histograms by document type, in the Prometheus text format."""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+def warm_up():
+    """Imports the OCR libraries ahead of the first upload, e.g. in a prefork server's master process."""
+    import PIL.Image  # noqa: F401
+    import pytesseract  # noqa: F401
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)  # OCR API runs on port 5000
+    # Development server only, use serve.py (gunicorn) in production
+    app.run(debug=True, port=OCR_API_PORT)  # OCR API runs on port 5000 by default
@@ -0,0 +1,210 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import metrics
+
+# PyMuPDF, pytesseract and PIL are imported inside the functions that need them, so importing this
+# module (and app.py) is cheap; warm_up() loads them up front where that matters.
+
+# Set Tesseract path if necessary (Windows users)
+# TESSERACT_CMD = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+TESSERACT_CMD = os.environ.get("TESSERACT_CMD")
+
+# --- OCR SETTINGS (override with environment variables) ---
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", os.cpu_count() or 1))  # 1 = OCR pages in-process
+OCR_DPI = int(os.environ.get("OCR_DPI", 200))  # Same resolution pdf2image rendered at by default
+MIN_PAGE_TEXT_CHARS = 10  # Pages with less text than this in their text layer are OCRed
+OCR_PREPROCESS = os.environ.get("OCR_PREPROCESS", "1") == "1"  # Deskew/threshold/crop pages before Tesseract
+CARD_ROI_OCR = os.environ.get("CARD_ROI_OCR", "1") == "1"  # Read Aadhaar/PAN cards from template regions only
+
+# Tesseract engine and page segmentation mode per doc type (matched by substring, first match wins):
+# ID cards are a block of short label/value lines, the other documents are columns of varied text.
+TESSERACT_CONFIGS = [
+    (("Aadhaar", "PAN"), "--oem 1 --psm 6"),
+    (("Certificate", "Course Fee Structure", "Income Proof", "Collateral"), "--oem 1 --psm 4"),
+]
+DEFAULT_TESSERACT_CONFIG = "--oem 1 --psm 3"
+
+_executor = None
+_executor_workers = 0
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(workers):
+    """Returns the shared OCR process pool, created on first use and reused across requests."""
+    global _executor, _executor_workers, _executor_pid
+    with _executor_lock:
+        if _executor_pid != os.getpid():  # A pool inherited through fork belongs to the parent
+            _executor = None
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(max_workers=workers)
+            _executor_workers = workers
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def get_tesseract():
+    """pytesseract, pointed at TESSERACT_CMD when that is set."""
+    import pytesseract
+
+    if TESSERACT_CMD:
+        pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    return pytesseract
+
+
+def warm_up():
+    """Imports the OCR libraries now instead of on the first upload (call before forking workers)."""
+    import fitz  # noqa: F401
+    import PIL.Image  # noqa: F401
+
+    get_tesseract()
+    if OCR_PREPROCESS:
+        import image_preprocessing  # noqa: F401  (OpenCV)
+
+
+def tesseract_config(doc_type=None):
+    for keywords, config in TESSERACT_CONFIGS:
+        if doc_type and any(keyword in doc_type for keyword in keywords):
+            return config
+    return DEFAULT_TESSERACT_CONFIG
+
+
+def ocr_profile(doc_type=None):
+    """Identifies everything besides the DPI that shapes OCR output, for cache keys."""
+    if OCR_PREPROCESS:
+        from image_preprocessing import PREPROCESS_VERSION
+
+        return f"pre{PREPROCESS_VERSION} {tesseract_config(doc_type)}"
+    return tesseract_config(doc_type)
+
+
+def fields_profile(doc_type=None):
+    """ocr_profile plus the card ROI OCR mode: everything besides the DPI that shapes extracted fields."""
+    # "roi+text": card regions merged with the full text (plain "roi" entries lack the fields without a region)
+    return f"{ocr_profile(doc_type)} roi+text" if CARD_ROI_OCR else ocr_profile(doc_type)
+
+
+def ocr_image(img, dpi=None, doc_type=None):
+    """OCRs a PIL image or grayscale array, preprocessed for Tesseract when OCR_PREPROCESS is on.
+
+    dpi is the image's resolution if known (rendered pages, scans that record it).
+    """
+    if OCR_PREPROCESS:
+        import numpy as np
+        from image_preprocessing import preprocess
+
+        if not isinstance(img, np.ndarray):
+            dpi = dpi or (img.info.get("dpi") or (None,))[0]
+            img = np.asarray(img.convert("L"))
+        with metrics.timer("preprocess", doc_type):
+            img = preprocess(img, source_dpi=dpi, target_dpi=OCR_DPI)
+    with metrics.timer("tesseract", doc_type):
+        return get_tesseract().image_to_string(img, config=tesseract_config(doc_type))
+
+
+def render_page(page, dpi=OCR_DPI):
+    """Rasterizes a PyMuPDF page into a grayscale PIL image."""
+    import fitz  # PyMuPDF for PDFs
+    from PIL import Image
+
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    return Image.frombytes("L", (pix.width, pix.height), pix.samples)
+
+
+def ocr_page(page, dpi=OCR_DPI, doc_type=None):
+    """OCRs a single PyMuPDF page."""
+    with metrics.timer("rasterize", doc_type):
+        img = render_page(page, dpi)
+    with img:
+        text = ocr_image(img, dpi, doc_type)
+    return text if text.endswith("\n") else text + "\n"
+
+
+def ocr_pdf_page(pdf_path, page_index, dpi=OCR_DPI, doc_type=None):
+    """Opens the PDF, rasterizes a single page (0-based) and returns its OCR text."""
+    import fitz
+
+    with fitz.open(pdf_path) as doc:
+        return ocr_page(doc[page_index], dpi, doc_type)
+
+
+def _ocr_pages(pdf_path, page_indexes, workers, dpi, doc=None, doc_type=None):
+    """OCRs the given pages and returns their text in the same order.
+
+    Each pool task rasterizes only its own page, so at most `workers` page
+    images are in memory at once and only page numbers and text cross process
+    boundaries. With one worker (or one page) the pages are OCRed in-process.
+    """
+    if workers <= 1 or len(page_indexes) <= 1:
+        if doc is not None:
+            return [ocr_page(doc[index], dpi, doc_type) for index in page_indexes]
+        return [ocr_pdf_page(pdf_path, index, dpi, doc_type) for index in page_indexes]
+
+    executor = _get_executor(workers)
+    count = len(page_indexes)
+    # map() yields results in submission order, so page order is preserved
+    return list(executor.map(ocr_pdf_page, [pdf_path] * count, page_indexes, [dpi] * count, [doc_type] * count))
+
+
+def ocr_pdf(pdf_path, workers=None, dpi=None, doc_type=None):
+    """OCRs every page of a PDF and joins the text in page order."""
+    import fitz
+
+    workers = OCR_WORKERS if workers is None else workers
+    dpi = OCR_DPI if dpi is None else dpi
+    with fitz.open(pdf_path) as doc:
+        return "".join(_ocr_pages(pdf_path, list(range(doc.page_count)), workers, dpi, doc, doc_type))
+
+
+def extract_pdf_text(pdf_path=None, workers=None, dpi=None, stream=None, doc_type=None):
+    """Extracts text page by page: the PDF text layer where a page has one, OCR for image-only pages.
+
+    Pass the PDF's bytes as stream instead of pdf_path to work from memory; pool
+    workers open the PDF by path, so its scanned pages are then OCRed in-process.
+    """
+    import fitz
+
+    workers = 1 if stream is not None else OCR_WORKERS if workers is None else workers
+    dpi = OCR_DPI if dpi is None else dpi
+    with (fitz.open(stream=stream, filetype="pdf") if stream is not None else fitz.open(pdf_path)) as doc:
+        with metrics.timer("text_layer", doc_type):
+            page_texts = [page.get_text("text") for page in doc]
+        scanned = [index for index, text in enumerate(page_texts) if len(text.strip()) < MIN_PAGE_TEXT_CHARS]
+        if scanned:
+            for index, text in zip(scanned, _ocr_pages(pdf_path, scanned, workers, dpi, doc, doc_type)):
+                page_texts[index] = text
+    return "".join(page_texts)
+
+
+def read_card_fields(pdf_path, doc_type):
+    """Fields of a scanned Aadhaar/PAN card, OCRed from its name/DOB/number regions only (see card_ocr).
+
+    Fields without a region (e.g. the Aadhaar address) are "Not Found"; the
+    caller fills them in from the full-page text with card_ocr.merge_fields.
+
+    Returns None when ROI OCR is off, the doc type has no card template, the
+    first page has a text layer (that beats OCR) or no readable card is found.
+    """
+    if not CARD_ROI_OCR:
+        return None
+    import fitz
+    import numpy as np
+    from card_ocr import CARD_DPI, read_card, template_for
+
+    if template_for(doc_type) is None:
+        return None
+    with fitz.open(pdf_path) as doc:
+        page = doc[0]
+        with metrics.timer("text_layer", doc_type):
+            text = page.get_text("text")
+        if len(text.strip()) >= MIN_PAGE_TEXT_CHARS:
+            return None
+        with metrics.timer("rasterize", doc_type):
+            img = render_page(page, CARD_DPI)
+        with img:
+            gray = np.asarray(img)
+    return read_card(gray, doc_type)
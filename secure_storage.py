@@ -0,0 +1,260 @@
+import base64
+import hashlib
+import io
+import os
+import struct
+import tempfile
+from collections import OrderedDict
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+# --- ENCRYPTION SETTINGS (override with environment variables) ---
+FRAME_SIZE = int(os.environ.get("ENCRYPTION_FRAME_SIZE", 64 * 1024))  # Plaintext bytes per frame
+
+# Container layout:
+#   header: MAGIC | version (1) | key id (8) | frame size (4) | salt (16)
+#   frames: final flag (1) | ciphertext length (4) | AES-256-GCM ciphertext + 16-byte tag
+# Every file gets its own AES key, derived from the master key and the random salt,
+# so the frame counter can serve as the nonce. Each frame's associated data is the
+# header, its index and the final flag: frames can't be reordered, swapped between
+# files or truncated without decryption failing.
+MAGIC = b"SBENC"
+VERSION = 1
+HEADER = struct.Struct(">5sB8sI16s")
+FRAME = struct.Struct(">BI")
+TAG_SIZE = 16
+
+FERNET_PREFIX = b"gAAAAA"  # Base64 of Fernet's 0x80 version byte + timestamp, i.e. a legacy whole-file token
+
+
+def key_id(key):
+    """Short fingerprint of a master key, stored in the header to tell which key a file needs."""
+    return hashlib.sha256(key).digest()[:8]
+
+
+class KeyRing:
+    """Every known master key by key id; the newest one encrypts, any of them decrypts."""
+
+    def __init__(self, keys):
+        if not keys:
+            raise ValueError("A key ring needs at least one key")
+        self._keys = OrderedDict((key_id(key), key) for key in keys)
+        self.active = keys[-1]
+        self.active_id = key_id(self.active)
+        self._legacy = MultiFernet([Fernet(key) for key in reversed(keys)])
+
+    @classmethod
+    def from_file(cls, path):
+        """Reads a key file holding one key per line, oldest first (a single-key secret.key works as is)."""
+        with open(path, "rb") as key_file:
+            return cls([line.strip() for line in key_file if line.strip()])
+
+    def save(self, path):
+        _write_atomically(path, lambda out: out.write(b"".join(key + b"\n" for key in self._keys.values())))
+
+    def rotated(self):
+        """Returns a ring with a freshly generated active key; older keys stay available for decryption."""
+        return KeyRing(list(self._keys.values()) + [Fernet.generate_key()])
+
+    def get(self, file_key_id):
+        key = self._keys.get(file_key_id)
+        if key is None:
+            raise InvalidToken(f"File was encrypted with an unknown key (key id {file_key_id.hex()})")
+        return key
+
+    def decrypt_legacy(self, token):
+        return self._legacy.decrypt(token)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def _as_keyring(key):
+    return key if isinstance(key, KeyRing) else KeyRing([key])
+
+
+def _file_cipher(key, salt):
+    master = base64.urlsafe_b64decode(key)  # The same Fernet key stored in secret.key
+    file_key = HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=b"smart-bank-file-v1").derive(master)
+    return AESGCM(file_key)
+
+
+def _frame_aad(header, index, final):
+    return header + struct.pack(">QB", index, final)
+
+
+def sniff_format(file_path):
+    """Returns "chunked", "fernet" or None (plain file) by looking at the first bytes only."""
+    with open(file_path, "rb") as file:
+        head = file.read(len(FERNET_PREFIX))
+    if head.startswith(MAGIC):
+        return "chunked"
+    if head == FERNET_PREFIX:
+        return "fernet"
+    return None
+
+
+def read_key_id(file_path):
+    """Key id from a chunked container's header, or None for legacy Fernet and plain files."""
+    with open(file_path, "rb") as file:
+        header = file.read(HEADER.size)
+    if len(header) == HEADER.size and header.startswith(MAGIC):
+        return HEADER.unpack(header)[2]
+    return None
+
+
+def _write_atomically(file_path, write):
+    """Calls write(out) on a temp file next to file_path, then renames it over file_path."""
+    folder = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(dir=folder, prefix=".crypt-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            write(out)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def encrypt_stream(source, out, key, frame_size=FRAME_SIZE):
+    """Encrypts the readable binary stream source into out, one frame at a time.
+
+    key is a master key or a KeyRing (whose active key is used).
+    """
+    key = _as_keyring(key).active
+    salt = os.urandom(16)
+    header = HEADER.pack(MAGIC, VERSION, key_id(key), frame_size, salt)
+    cipher = _file_cipher(key, salt)
+    out.write(header)
+
+    index = 0
+    chunk = source.read(frame_size)
+    while True:
+        following = source.read(frame_size)  # Read ahead so the last frame can be flagged as final
+        final = 0 if following else 1
+        ciphertext = cipher.encrypt(struct.pack(">4xQ", index), chunk, _frame_aad(header, index, final))
+        out.write(FRAME.pack(final, len(ciphertext)))
+        out.write(ciphertext)
+        if final:
+            return
+        chunk = following
+        index += 1
+
+
+def decrypt_stream(source, key):
+    """Yields the plaintext of a chunked container read from source, frame by frame.
+
+    key is a master key or a KeyRing; the header's key id picks the key. Raises
+    InvalidToken if the key is unknown or the file was modified or truncated.
+    """
+    header = source.read(HEADER.size)
+    if len(header) != HEADER.size:
+        raise InvalidToken("Truncated header")
+    magic, version, file_key_id, frame_size, salt = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise InvalidToken("Not a supported encrypted file")
+    key = _as_keyring(key).get(file_key_id)
+    cipher = _file_cipher(key, salt)
+
+    index = 0
+    while True:
+        frame = source.read(FRAME.size)
+        if len(frame) != FRAME.size:
+            raise InvalidToken("Truncated file")
+        final, length = FRAME.unpack(frame)
+        if length > frame_size + TAG_SIZE:
+            raise InvalidToken("Corrupted frame")
+        ciphertext = source.read(length)
+        try:
+            yield cipher.decrypt(struct.pack(">4xQ", index), ciphertext, _frame_aad(header, index, final))
+        except InvalidTag:
+            raise InvalidToken(f"Frame {index} failed authentication") from None
+        if final:
+            if source.read(1):
+                raise InvalidToken("Unexpected data after the final frame")
+            return
+        index += 1
+
+
+def iter_decrypted(file_path, key):
+    """Yields the plaintext of an encrypted file (chunked or legacy Fernet) without touching the file."""
+    if sniff_format(file_path) == "fernet":
+        with open(file_path, "rb") as file:
+            yield _as_keyring(key).decrypt_legacy(file.read())  # Legacy tokens are one piece, there is nothing to stream
+        return
+    with open(file_path, "rb") as file:
+        yield from decrypt_stream(file, key)
+
+
+def open_decrypted(file_path, key):
+    """Decrypts an encrypted file into a BytesIO positioned at 0; the file on disk stays encrypted."""
+    buffer = io.BytesIO()
+    for chunk in iter_decrypted(file_path, key):
+        buffer.write(chunk)
+    buffer.seek(0)
+    return buffer
+
+
+def encrypt_file(file_path, key, frame_size=FRAME_SIZE):
+    """Encrypts a file in place into the chunked container, in constant memory."""
+    with open(file_path, "rb") as source:
+        _write_atomically(file_path, lambda out: encrypt_stream(source, out, key, frame_size))
+
+
+def decrypt_file(file_path, key):
+    """Decrypts a chunked or legacy Fernet file in place.
+
+    The plaintext only replaces the encrypted file once every frame has been
+    authenticated, so a wrong key or a damaged file leaves it untouched.
+    """
+    def write(out):
+        for chunk in iter_decrypted(file_path, key):
+            out.write(chunk)
+
+    _write_atomically(file_path, write)
+
+
+class _ChunkReader:
+    """Minimal read(size) file object over an iterator of byte chunks."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._chunk = b""
+        self._pos = 0
+
+    def read(self, size):
+        parts = []
+        while size > 0:
+            if self._pos == len(self._chunk):
+                self._chunk = next(self._chunks, None)
+                self._pos = 0
+                if self._chunk is None:
+                    self._chunk = b""
+                    break
+            part = self._chunk[self._pos:self._pos + size]
+            self._pos += len(part)
+            size -= len(part)
+            parts.append(part)
+        return b"".join(parts)
+
+
+def reencrypt_file(file_path, keyring):
+    """Re-encrypts a file under the ring's active key; returns "rotated", "current" or "plain".
+
+    Files already carrying the active key id are left alone, so an interrupted
+    rotation can simply be run again. Each file is replaced atomically.
+    """
+    fmt = sniff_format(file_path)
+    if fmt is None:
+        return "plain"
+    if fmt == "chunked" and read_key_id(file_path) == keyring.active_id:
+        return "current"
+    _write_atomically(file_path, lambda out: encrypt_stream(_ChunkReader(iter_decrypted(file_path, keyring)), out, keyring))
+    return "rotated"
@@ -0,0 +1,106 @@
+"""Production server: runs app.py, ocr_api.py or test.py under gunicorn instead of Flask's dev server.
+
+The app module is imported and warmed up (OCR libraries, templates) once in
+the gunicorn master, then workers are forked from it and share that memory
+copy-on-write.
+
+Graceful reload:
+    kill -HUP <master pid>     re-forks workers from the master, letting in-flight requests finish
+    kill -USR2 <master pid>    starts a new master on the new code; then kill -QUIT the old one
+
+Run with: python serve.py [app|ocr_api|test] [--workers N] [--threads N] [--bind HOST:PORT]
+"""
+import argparse
+import gc
+import importlib
+import os
+
+from gunicorn.app.base import BaseApplication
+
+# --- SERVER SETTINGS (override with environment variables or command line options) ---
+WEB_BIND = os.environ.get("WEB_BIND", "0.0.0.0:8000")
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", (os.cpu_count() or 1) * 2 + 1))
+WEB_THREADS = int(os.environ.get("WEB_THREADS", 1))  # More than 1 switches to threaded (gthread) workers
+WEB_TIMEOUT = int(os.environ.get("WEB_TIMEOUT", 120))  # OCR of a large scan can take a while
+WEB_PIDFILE = os.environ.get("WEB_PIDFILE")
+
+ENTRY_POINTS = ("app", "ocr_api", "test")
+
+
+def post_fork(server, worker):
+    """Runs in each new worker: starts its stale job reaper; the first one re-queues the last run's jobs.
+
+    The reaper picks up jobs orphaned later on, when a worker is recycled
+    (HUP reload, timeout, crash) with jobs in its process pool.
+    """
+    module = importlib.import_module(server.app.module_name)
+    for name in ("document_jobs", "video_jobs"):
+        jobs = getattr(module, name, None)
+        if jobs is None:
+            continue
+        if worker.age == 1:
+            resumed = jobs.resume()
+            if resumed:
+                server.log.info("Re-queued %d unfinished %s", resumed, name.replace("_", " "))
+        jobs.start_reaper()
+
+
+def size_pools(workers):
+    """Defaults for the per-worker process pools, so all web workers' pools together stay near one process per CPU.
+
+    Each web worker has its own job pool (JOB_WORKERS), each job process its
+    own OCR page pool (OCR_WORKERS) and ocr_api's workers a batch pool
+    (BATCH_WORKERS); left at their standalone defaults they multiply to
+    workers x 2 x CPUs processes. Values set in the environment are kept.
+    """
+    cpus = os.cpu_count() or 1
+    os.environ.setdefault("JOB_WORKERS", str(max(1, cpus // workers)))
+    os.environ.setdefault("OCR_WORKERS", str(max(1, cpus // (workers * int(os.environ["JOB_WORKERS"])))))
+    os.environ.setdefault("BATCH_WORKERS", str(max(1, cpus // workers)))
+
+
+class ProductionServer(BaseApplication):
+    def __init__(self, module_name, options):
+        self.module_name = module_name
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for name, value in self.options.items():
+            self.cfg.set(name, value)
+
+    def load(self):
+        # With preload_app this runs once, in the master, before any worker is forked
+        module = importlib.import_module(self.module_name)
+        if hasattr(module, "warm_up"):
+            module.warm_up()
+        gc.freeze()  # Keep the preloaded objects out of GC passes so workers don't copy their pages
+        return module.app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve one of the Flask apps with gunicorn.")
+    parser.add_argument("module", nargs="?", default="app", choices=ENTRY_POINTS)
+    parser.add_argument("--bind", default=WEB_BIND)
+    parser.add_argument("--workers", type=int, default=WEB_WORKERS)
+    parser.add_argument("--threads", type=int, default=WEB_THREADS)
+    parser.add_argument("--timeout", type=int, default=WEB_TIMEOUT)
+    parser.add_argument("--pid", default=WEB_PIDFILE, help="write the master's pid here (for HUP/USR2 reloads)")
+    args = parser.parse_args()
+
+    size_pools(args.workers)  # Before the app module (and its settings) is imported
+    ProductionServer(args.module, {
+        "bind": args.bind,
+        "workers": args.workers,
+        "threads": args.threads,
+        "timeout": args.timeout,
+        "graceful_timeout": 30,
+        "preload_app": True,
+        "pidfile": args.pid,
+        "post_fork": post_fork,
+        "accesslog": "-",
+    }).run()
+
+
+if __name__ == "__main__":
+    main()
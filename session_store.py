@@ -0,0 +1,175 @@
+import json
+import os
+import secrets
+import threading
+import time
+import zlib
+
+from flask import g
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+import metrics
+import sqlite_db
+
+# --- SESSION SETTINGS (override with environment variables) ---
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "sqlite")  # "sqlite" or "memory"
+SESSION_DB = os.environ.get("SESSION_DB", "sessions.sqlite3")
+SESSION_TTL = int(os.environ.get("SESSION_TTL", 24 * 60 * 60))  # Seconds since last write
+
+COMPRESS_OVER_BYTES = 512  # Larger payloads are zlib-compressed
+
+
+def dumps(data):
+    """Compact serialization: minimal JSON, zlib-compressed when that pays off (first byte marks which)."""
+    raw = json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode()
+    if len(raw) > COMPRESS_OVER_BYTES:
+        return b"z" + zlib.compress(raw)
+    return b"j" + raw
+
+
+def loads(blob):
+    blob = bytes(blob)
+    raw = zlib.decompress(blob[1:]) if blob[:1] == b"z" else blob[1:]
+    return json.loads(raw)
+
+
+class MemorySessionStore:
+    """In-process session store with TTL eviction (single-process servers)."""
+
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+        self._items = {}
+        self._lock = threading.Lock()
+        self._next_sweep = 0
+
+    def get(self, sid):
+        with self._lock:
+            item = self._items.get(sid)
+            if item is None:
+                return None
+            expires, blob = item
+            if expires < time.time():
+                del self._items[sid]
+                return None
+            return loads(blob)
+
+    def set(self, sid, data):
+        now = time.time()
+        with self._lock:
+            self._items[sid] = (now + self.ttl, dumps(data))
+            if now >= self._next_sweep:  # Evict expired sessions at most once a minute
+                for expired in [key for key, (expires, _) in self._items.items() if expires < now]:
+                    del self._items[expired]
+                self._next_sweep = now + 60
+
+    def delete(self, sid):
+        with self._lock:
+            self._items.pop(sid, None)
+
+
+class SQLiteSessionStore:
+    """SQLite-backed session store, shared by every worker process on the box."""
+
+    def __init__(self, path=SESSION_DB, ttl=SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._next_sweep = 0
+
+    def _connection(self):
+        return sqlite_db.connect(self.path, [
+            "CREATE TABLE IF NOT EXISTS sessions (sid TEXT PRIMARY KEY, data BLOB NOT NULL, expires REAL NOT NULL)",
+        ])
+
+    def get(self, sid):
+        row = self._connection().execute(
+            "SELECT data FROM sessions WHERE sid = ? AND expires >= ?", (sid, time.time())
+        ).fetchone()
+        return loads(row[0]) if row else None
+
+    def set(self, sid, data):
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (sid, data, expires) VALUES (?, ?, ?)",
+                (sid, dumps(data), now + self.ttl),
+            )
+            if now >= self._next_sweep:  # Evict expired sessions at most once a minute
+                conn.execute("DELETE FROM sessions WHERE expires < ?", (now,))
+                self._next_sweep = now + 60
+
+    def delete(self, sid):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+
+def make_session_store(backend=SESSION_BACKEND):
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    raise ValueError(f"Unknown session backend: {backend!r}")
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keeps only a signed session id in the cookie; the session data lives in `store`."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt="server-side-session")
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+            if sid:
+                data = self.store.get(sid)
+                if data is not None:
+                    return ServerSideSession(data, sid=sid)
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified:  # Cleared, e.g. at the end of the chatbot flow
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if not session.modified:
+            return
+        # Timed per document type when the view set g.doc_type (an upload step)
+        with metrics.timer("session_write", g.get("doc_type")):
+            self.store.set(session.sid, dict(session))
+        if session.new:
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid).decode(),
+                httponly=self.get_cookie_httponly(app),
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+                path=path,
+                domain=domain,
+            )
@@ -0,0 +1,31 @@
+import os
+import sqlite3
+import threading
+
+# The session, job, document cache/metadata and metrics stores are SQLite files in WAL mode, written
+# by the web workers, the job workers and the OCR pool processes alike.
+
+_connections = {}
+_connections_lock = threading.Lock()
+
+
+def connect(path, schema=(), isolation_level="", synchronous=None):
+    """The connection to the database at path for this process, created (with its schema) on first use.
+
+    A SQLite connection must not be shared with the parent process after a
+    fork, so there is one per database and process id; the threads of a
+    process share it. schema is a sequence of CREATE ... IF NOT EXISTS statements.
+    """
+    key = (path, os.getpid())
+    with _connections_lock:
+        conn = _connections.get(key)
+        if conn is None:
+            conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=isolation_level)
+            conn.execute("PRAGMA journal_mode=WAL")
+            if synchronous:
+                conn.execute(f"PRAGMA synchronous={synchronous}")
+            with conn:
+                for statement in schema:
+                    conn.execute(statement)
+            _connections[key] = conn
+        return conn
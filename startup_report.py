@@ -0,0 +1,69 @@
+"""Startup-time report: import time and first/second request latency of each entry point.
+
+Every entry point is measured in a fresh interpreter, run from a scratch
+working directory so the upload folders and databases it creates don't land
+in the repo. Pass another checkout (e.g. a `git worktree` of an older commit)
+to compare against it.
+
+Run with: python startup_report.py [repo_dir]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SAMPLE_TEXT = "INCOME TAX DEPARTMENT\nName: JOHN DOE\nDate of Birth: 01/01/1990\nABCDE1234F\n"
+
+# module name -> code run (twice) as the "first request"; `module` is the imported entry point
+ENTRY_POINTS = {
+    "app": "module.app.test_client().get('/')",
+    "Encrypted_app": f"module.verify_document({SAMPLE_TEXT!r})",
+    "ocr_api": "module.app.test_client().post('/upload')",  # Request dispatch only, no document attached
+    "test": "module.app.test_client().get('/')",
+}
+
+CHILD = """
+import importlib, json, sys, time
+sys.path.insert(0, {repo!r})
+result = {{}}
+try:
+    started = time.perf_counter()
+    module = importlib.import_module({name!r})
+    result["import_ms"] = (time.perf_counter() - started) * 1000
+    for key in ("first_request_ms", "second_request_ms"):
+        started = time.perf_counter()
+        {request}
+        result[key] = (time.perf_counter() - started) * 1000
+except BaseException as e:
+    result["error"] = f"{{type(e).__name__}}: {{e}}"
+print(json.dumps(result))
+"""
+
+
+def measure(repo, name, request):
+    with tempfile.TemporaryDirectory() as cwd:
+        code = CHILD.format(repo=repo, name=name, request=request)
+        completed = subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True, timeout=600)
+    lines = completed.stdout.strip().splitlines()
+    try:
+        return json.loads(lines[-1])
+    except (IndexError, ValueError):
+        return {"error": (completed.stderr.strip().splitlines() or ["no output"])[-1]}
+
+
+def main():
+    repo = os.path.abspath(sys.argv[1]) if len(sys.argv) > 1 else HERE
+    print(f"Startup report for {repo}\n")
+    print(f"{'entry point':<16}{'import ms':>11}{'1st request ms':>16}{'2nd request ms':>16}")
+    for name, request in ENTRY_POINTS.items():
+        result = measure(repo, name, request)
+        cells = [result.get(key) for key in ("import_ms", "first_request_ms", "second_request_ms")]
+        row = "".join(f"{cell:>{width}.1f}" if cell is not None else f"{'-':>{width}}" for cell, width in zip(cells, (11, 16, 16)))
+        print(f"{name + '.py':<16}{row}  {result.get('error', '')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,11 @@
 from flask import Flask, request, session, redirect, render_template_string
 import os
 import json
-import pytesseract
-import cv2
 import re
-import pdfplumber
 from datetime import datetime
 
+import ocr_engine
+
 app = Flask(__name__)
 app.secret_key = "chatbot_secret_key"  # Secret key for session management
 
@@ -23,7 +22,12 @@ CHATBOT_FLOW = [
 
 # Function to Extract Aadhaar Details
 def extract_aadhaar_details(file_path):
+    # OCR/PDF libraries are imported on first use to keep startup fast
+    import cv2
+    import pdfplumber
+
     text = ""
+    card_fields = None
 
     # Extract text from PDF
     if file_path.endswith('.pdf'):
@@ -34,7 +38,14 @@ def extract_aadhaar_details(file_path):
         # Extract text from Image
         image = cv2.imread(file_path)
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        text = pytesseract.image_to_string(gray)
+
+        # Card photos/scans: the name/DOB/number are read from their regions when the card can be located
+        if ocr_engine.CARD_ROI_OCR:
+            from card_ocr import read_card
+            card_fields = read_card(gray, "Aadhaar Card")
+
+        # Downscaled, deskewed, thresholded and cropped first, then OCRed with the ID-card Tesseract mode
+        text = ocr_engine.ocr_image(gray, doc_type="Aadhaar Card")
 
     # Remove unnecessary newlines
     text = text.replace("\n", " ")
@@ -62,6 +73,11 @@ def extract_aadhaar_details(file_path):
         "Address": address_match.group(1).strip() if address_match else "Not Found"
     }
 
+    # The card regions' values win, the full text fills in the rest (e.g. the address, which has no region)
+    if card_fields is not None:
+        from card_ocr import merge_fields
+        extracted_data = merge_fields(card_fields, extracted_data)
+
     return extracted_data
 
 
@@ -132,5 +148,12 @@ def chatbot():
         </html>
     """)
 
+def warm_up():
+    """Imports the OCR/PDF libraries ahead of the first upload, e.g. in a prefork server's master process."""
+    import pytesseract  # noqa: F401
+    import cv2  # noqa: F401
+    import pdfplumber  # noqa: F401
+
 if __name__ == '__main__':
+    # Development server only, use serve.py (gunicorn) in production
     app.run(debug=True)
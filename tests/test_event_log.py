@@ -0,0 +1,35 @@
+import event_log
+
+AADHAAR_LAYOUTS = ["1234 5678 9012", "1234-5678-9012", "123456789012", "1234\n5678\n9012", "1234\t5678  9012",
+                   "1234 \n 5678\r\n9012"]
+
+
+def test_redact_masks_aadhaar_split_by_any_whitespace():
+    for number in AADHAAR_LAYOUTS:
+        redacted = event_log.redact(f"Aadhaar No:{number}\nDOB")
+        assert "1234" not in redacted and "5678" not in redacted, repr(number)
+        assert redacted.endswith("9012\nDOB")
+
+
+def test_redact_masks_pan_in_any_case():
+    for pan in ("ABCDE1234F", "abcde1234f", "AbCdE1234f"):
+        redacted = event_log.redact(f"PAN:{pan}.")
+        assert redacted == f"PAN:XXXXXX{pan[-4:]}.", pan
+
+
+def test_redact_leaves_longer_numbers_alone():
+    assert event_log.redact("Account 12345678901234") == "Account 12345678901234"
+
+
+def test_excerpt_never_leaks_a_number_cut_by_the_limit():
+    for number in AADHAAR_LAYOUTS + ["ABCDE1234F", "AbCdE1234f"]:
+        text = f"Name: RAVI KUMAR\nAadhaar:\n{number}\nAddress: 12 MG Road, Bengaluru\n" * 3
+        full = event_log.redact(text)
+        for limit in range(len(text)):
+            excerpt = event_log.excerpt(text, limit)
+            assert excerpt.startswith(full[:limit]), (number, limit)
+
+
+def test_excerpt_reports_the_characters_left_out():
+    assert event_log.excerpt("x" * 30, 10) == "x" * 10 + "… (+20 chars)"
+    assert event_log.excerpt("PAN abcde1234f", 100) == "PAN XXXXXX234f"
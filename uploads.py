@@ -0,0 +1,121 @@
+import hashlib
+import os
+import tempfile
+import uuid
+
+from flask import Request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+# --- UPLOAD SETTINGS (override with environment variables) ---
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", 1024 * 1024))  # Disk write size
+DOCUMENT_MAX_BYTES = int(os.environ.get("DOCUMENT_MAX_BYTES", 20 * 1024 * 1024))
+VIDEO_MAX_BYTES = int(os.environ.get("VIDEO_MAX_BYTES", 1024 * 1024 * 1024))
+
+# Room for multipart boundaries/headers and small form fields around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class StreamingUpload:
+    """Writable file object that the multipart parser streams an uploaded file into.
+
+    Data goes straight to a temporary file next to its final destination in
+    fixed-size chunks and is hashed on the fly, so the upload is never held in
+    memory and saving it later is a rename instead of a copy. Exceeding
+    max_bytes aborts the request with 413 and removes the partial file.
+    """
+
+    def __init__(self, folder, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        fd, self.temp_path = tempfile.mkstemp(dir=folder, prefix=".upload-")
+        self._file = os.fdopen(fd, "w+b", buffering=UPLOAD_CHUNK_SIZE)
+        self._committed = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self.close()
+            raise RequestEntityTooLarge(f"Uploads for this step are limited to {self.max_bytes // (1024 * 1024)} MB.")
+        self.sha256.update(data)
+        return self._file.write(data)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def commit(self, destination):
+        """Moves the finished upload to its destination (atomic rename, it's on the same filesystem)."""
+        self._file.close()
+        os.replace(self.temp_path, destination)
+        self._committed = True
+        return self.sha256.hexdigest(), self.size
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+        if not self._committed and os.path.exists(self.temp_path):
+            os.remove(self.temp_path)  # Aborted or never saved
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+
+class StreamingUploadRequest(Request):
+    """Request class whose file uploads are streamed to disk by StreamingUpload.
+
+    Views call limit_uploads() before touching request.form/files to choose
+    the destination folder and the size limit for the current step.
+    """
+
+    upload_folder = None
+    upload_max_bytes = None
+
+    def limit_uploads(self, folder, max_bytes):
+        self.upload_folder = folder
+        self.upload_max_bytes = max_bytes
+        # Reject oversized bodies up front when the client announces their size
+        if self.content_length is not None and self.content_length > max_bytes + MULTIPART_OVERHEAD:
+            raise RequestEntityTooLarge(f"Uploads for this step are limited to {max_bytes // (1024 * 1024)} MB.")
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.upload_folder is None:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return StreamingUpload(self.upload_folder, self.upload_max_bytes)
+
+
+def upload_path(folder, applicant, filename):
+    """A new, unique path in folder for an applicant's upload of `filename`: <folder>/<applicant>/<uuid4><ext>.
+
+    The client's filename is only kept for its extension (and in the upload's
+    metadata record), so two uploads of "aadhaar.pdf" never overwrite each other.
+    The applicant's directory is named by a hash of their session id.
+    """
+    applicant_folder = os.path.join(folder, hashlib.sha256((applicant or "").encode()).hexdigest()[:16])
+    os.makedirs(applicant_folder, exist_ok=True)
+    extension = os.path.splitext(filename or "")[1].lower()
+    if not extension[1:].isalnum():
+        extension = ""
+    return os.path.join(applicant_folder, uuid.uuid4().hex + extension)
+
+
+def save_upload(file, destination):
+    """Saves an uploaded FileStorage to destination and returns (sha256 hex digest, size in bytes)."""
+    if isinstance(file.stream, StreamingUpload):
+        return file.stream.commit(destination)
+
+    # Not streamed by StreamingUploadRequest: copy in chunks, hashing as we go
+    sha256 = hashlib.sha256()
+    size = 0
+    with open(destination, "wb") as out:
+        for chunk in iter(lambda: file.stream.read(UPLOAD_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+            out.write(chunk)
+            size += len(chunk)
+    return sha256.hexdigest(), size
@@ -0,0 +1,245 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+# OpenCV is imported inside the functions that need it, so importing this module (and app.py) stays cheap.
+
+# --- VIDEO PIPELINE SETTINGS (override with environment variables) ---
+VIDEO_RENDITION_FOLDER = os.environ.get("VIDEO_RENDITION_FOLDER", "video_renditions")
+VIDEO_JOB_DB = os.environ.get("VIDEO_JOB_DB", "video_jobs.sqlite3")  # Own job table: resume() re-queues its unfinished, stale jobs
+VIDEO_WORKERS = int(os.environ.get("VIDEO_WORKERS", 1))  # Preview encoding is CPU heavy, keep it off the OCR workers
+KEYFRAME_INTERVAL = float(os.environ.get("KEYFRAME_INTERVAL", 2.0))  # Seconds between sampled frames
+MAX_KEYFRAMES = int(os.environ.get("MAX_KEYFRAMES", 60))  # Longer videos are sampled more sparsely
+KEYFRAME_MAX_HEIGHT = int(os.environ.get("KEYFRAME_MAX_HEIGHT", 720))
+PREVIEW_HEIGHT = int(os.environ.get("PREVIEW_HEIGHT", 360))
+PREVIEW_BITRATE = os.environ.get("PREVIEW_BITRATE", "400k")
+PREVIEW_FPS = int(os.environ.get("PREVIEW_FPS", 15))
+FFMPEG_CMD = os.environ.get("FFMPEG_CMD", "ffmpeg")
+FFPROBE_CMD = os.environ.get("FFPROBE_CMD", "ffprobe")
+
+DARK_FRAME_MEAN = 40  # Frames darker than this (lens covered, fade-in) never become the poster
+
+
+def _fraction(value):
+    """ffprobe rates like "30000/1001" as a float (0.0 if unknown)."""
+    numerator, _, denominator = str(value or "0").partition("/")
+    try:
+        return float(numerator) / float(denominator or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def _probe_ffprobe(video_path):
+    output = subprocess.run(
+        [FFPROBE_CMD, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", video_path],
+        check=True, capture_output=True, timeout=60,
+    ).stdout
+    probed = json.loads(output)
+    streams = probed.get("streams", [])
+    video = next((stream for stream in streams if stream.get("codec_type") == "video"), {})
+    audio = next((stream for stream in streams if stream.get("codec_type") == "audio"), {})
+    return {
+        "duration": float(probed.get("format", {}).get("duration") or video.get("duration") or 0),
+        "width": video.get("width"),
+        "height": video.get("height"),
+        "fps": round(_fraction(video.get("avg_frame_rate")), 3),
+        "video_codec": video.get("codec_name"),
+        "audio_codec": audio.get("codec_name"),
+        "bit_rate": int(probed.get("format", {}).get("bit_rate") or 0) or None,
+        "probed_with": "ffprobe",
+    }
+
+
+def _probe_opencv(video_path):
+    import cv2
+
+    capture = cv2.VideoCapture(video_path)
+    try:
+        if not capture.isOpened():
+            raise ValueError(f"Not a readable video: {video_path}")
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        frames = capture.get(cv2.CAP_PROP_FRAME_COUNT)
+        fourcc = int(capture.get(cv2.CAP_PROP_FOURCC))
+        return {
+            "duration": round(frames / fps, 3) if fps else 0.0,
+            "width": int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": round(fps, 3),
+            "video_codec": "".join(chr((fourcc >> shift) & 0xFF) for shift in (0, 8, 16, 24)).strip("\0 ") or None,
+            "audio_codec": None,  # OpenCV doesn't read audio streams
+            "bit_rate": None,
+            "probed_with": "opencv",
+        }
+    finally:
+        capture.release()
+
+
+def probe(video_path):
+    """Duration, size, frame rate and codecs of a video: ffprobe when installed, otherwise OpenCV."""
+    if shutil.which(FFPROBE_CMD):
+        return _probe_ffprobe(video_path)
+    return _probe_opencv(video_path)
+
+
+def sample_times(duration, interval=KEYFRAME_INTERVAL, max_frames=MAX_KEYFRAMES):
+    """Timestamps (seconds) to sample: every `interval`, spread out further when that would exceed max_frames."""
+    if duration <= 0:
+        return [0.0]
+    count = min(int(duration // interval) + 1, max_frames)
+    step = max(interval, duration / count)
+    return [round(index * step, 3) for index in range(count)]
+
+
+def iter_keyframes(video_path, times):
+    """Yields (seconds, frame) for each timestamp by seeking.
+
+    A seek jumps to the nearest keyframe before the timestamp and decodes
+    forward from there, so only a few frames per sample are decoded instead
+    of the whole video.
+    """
+    import cv2
+
+    capture = cv2.VideoCapture(video_path)
+    try:
+        for seconds in times:
+            capture.set(cv2.CAP_PROP_POS_MSEC, seconds * 1000)
+            ok, frame = capture.read()
+            if not ok:
+                break  # Past the real end (containers often overstate the duration)
+            yield seconds, frame
+    finally:
+        capture.release()
+
+
+def _fit_height(frame, max_height):
+    import cv2
+
+    height, width = frame.shape[:2]
+    if height <= max_height:
+        return frame
+    scale = max_height / height
+    return cv2.resize(frame, (round(width * scale / 2) * 2, max_height), interpolation=cv2.INTER_AREA)
+
+
+def _poster_score(frame):
+    """Sharpness (variance of the Laplacian) of a frame; dark frames score 0."""
+    import cv2
+
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if gray.mean() < DARK_FRAME_MEAN:
+        return 0.0
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+def _preview_ffmpeg(video_path, output_path):
+    """H.264/AAC MP4 at PREVIEW_HEIGHT and PREVIEW_BITRATE, moov atom first so playback starts immediately."""
+    subprocess.run(
+        [FFMPEG_CMD, "-v", "error", "-y", "-i", video_path,
+         "-vf", f"scale=-2:'min({PREVIEW_HEIGHT},ih)'", "-r", str(PREVIEW_FPS),
+         "-c:v", "libx264", "-preset", "veryfast", "-b:v", PREVIEW_BITRATE, "-maxrate", PREVIEW_BITRATE,
+         "-bufsize", PREVIEW_BITRATE, "-pix_fmt", "yuv420p",
+         "-c:a", "aac", "-b:a", "64k", "-ac", "1", "-movflags", "+faststart", "-f", "mp4", output_path],
+        check=True, capture_output=True,
+    )
+
+
+def _preview_opencv(video_path, output_path, fps):
+    """Silent VP8 WebM at PREVIEW_HEIGHT and PREVIEW_FPS (the fallback when ffmpeg isn't installed)."""
+    import cv2
+
+    capture = cv2.VideoCapture(video_path)
+    writer = None
+    try:
+        keep_every = max(1, round(fps / PREVIEW_FPS)) if fps else 1
+        index = 0
+        while capture.grab():
+            if index % keep_every == 0:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                frame = _fit_height(frame, PREVIEW_HEIGHT)
+                if writer is None:
+                    height, width = frame.shape[:2]
+                    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*"VP80"),
+                                             (fps or PREVIEW_FPS) / keep_every, (width, height))
+                writer.write(frame)
+            index += 1
+    finally:
+        capture.release()
+        if writer is not None:
+            writer.release()
+
+
+def make_preview(video_path, output_folder, fps):
+    """Writes the low-bitrate preview rendition into output_folder and returns its path."""
+    use_ffmpeg = shutil.which(FFMPEG_CMD) is not None
+    preview_path = os.path.join(output_folder, "preview.mp4" if use_ffmpeg else "preview.webm")
+    # Encode to a temporary name so a half-written preview is never served
+    fd, temp_path = tempfile.mkstemp(dir=output_folder, prefix=".preview-", suffix=os.path.splitext(preview_path)[1])
+    os.close(fd)
+    try:
+        if use_ffmpeg:
+            _preview_ffmpeg(video_path, temp_path)
+        else:
+            _preview_opencv(video_path, temp_path, fps)
+        os.replace(temp_path, preview_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return preview_path
+
+
+def process_video(video_path, output_folder):
+    """Probes a video and renders its keyframes, poster and preview into output_folder; the original isn't touched.
+
+    Returns {"probe", "keyframes": [{"time", "path"}], "poster", "preview"}. The
+    result is also saved as info.json, so the same video (output_folder is
+    named after its digest) is only processed once.
+    """
+    import cv2
+
+    info_path = os.path.join(output_folder, "info.json")
+    if os.path.exists(info_path):
+        with open(info_path, encoding="utf-8") as info_file:
+            return json.load(info_file)
+
+    os.makedirs(output_folder, exist_ok=True)
+    video_info = probe(video_path)
+
+    keyframes = []
+    poster, poster_score = None, -1.0
+    for number, (seconds, frame) in enumerate(iter_keyframes(video_path, sample_times(video_info["duration"]))):
+        frame = _fit_height(frame, KEYFRAME_MAX_HEIGHT)
+        keyframe_path = os.path.join(output_folder, f"keyframe_{number:03d}.jpg")
+        cv2.imwrite(keyframe_path, frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        keyframes.append({"time": seconds, "path": keyframe_path})
+        score = _poster_score(frame)
+        if score > poster_score:
+            poster, poster_score = frame, score
+
+    poster_path = None
+    if poster is not None:
+        poster_path = os.path.join(output_folder, "poster.jpg")
+        cv2.imwrite(poster_path, _fit_height(poster, PREVIEW_HEIGHT), [cv2.IMWRITE_JPEG_QUALITY, 80])
+
+    result = {
+        "probe": video_info,
+        "keyframes": keyframes,
+        "poster": poster_path,
+        "preview": make_preview(video_path, output_folder, video_info["fps"]),
+    }
+    # Written under a temporary name and renamed, so a crash or a second job on the same digest
+    # never leaves a truncated info.json behind
+    fd, temp_path = tempfile.mkstemp(dir=output_folder, prefix=".info-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as info_file:
+            json.dump(result, info_file)
+            info_file.flush()
+            os.fsync(info_file.fileno())
+        os.replace(temp_path, info_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return result